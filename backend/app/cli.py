@@ -0,0 +1,323 @@
+"""
+beo-split: batch command-line splitter for archived BEO packets.
+
+Splits every PDF given (files, directories or glob patterns) across a process
+pool. Each input gets its own output directory under --outdir, named after the
+file, holding the BEO PDFs, problem buckets and split_report.csv; one
+batch_report.csv in --outdir covers the whole run. Needs no API settings.
+
+    python -m app.cli /archive/2023 "/archive/2024/*.pdf" -o /out --workers 8 --resume
+"""
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from app.core.beo_split import PageResult, split_pdf
+from app.core.pools import spawn_pool
+
+DONE_MARKER = ".done.json"
+BATCH_REPORT = "batch_report.csv"
+REPORT_FIELDS = [
+    "input", "output_dir", "status", "pages", "beos", "problem_pages", "seconds", "pages_per_sec", "error",
+]
+# process_file options that change what is written; --resume redoes inputs split with other values.
+OUTPUT_OPTIONS = {
+    "summary_page_count": 3,
+    "stop_on_problems": False,
+    "zip_output": False,
+    "ocr": False,
+    "extended_report": False,
+}
+
+
+def find_inputs(patterns: List[str], recursive: bool = False) -> List[str]:
+    """
+    Expand files, directories (their *.pdf files) and glob patterns into a
+    sorted, de-duplicated list of absolute PDF paths.
+    """
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*.pdf") if recursive else os.path.join(pattern, "*.pdf")
+        matches = glob.glob(pattern, recursive=recursive) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if os.path.isfile(path) and path.lower().endswith(".pdf"):
+                found.add(os.path.abspath(path))
+    return sorted(found)
+
+
+def output_dirs(inputs: List[str], outdir: str) -> Dict[str, str]:
+    """
+    Output directory per input, named after the file. An input whose name is
+    already taken (by another input in this batch, or by an earlier run's
+    output for a different file) gets a suffix derived from its full path, so a
+    file keeps its directory across runs and --resume finds it.
+    """
+    dirs = {}
+    claimed = set()
+    for path in inputs:
+        name = os.path.splitext(os.path.basename(path))[0]
+        owner = _marker_input(os.path.join(outdir, name))
+        if name in claimed or (owner is not None and owner != path):
+            name = f"{name}_{hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}"
+        claimed.add(name)
+        dirs[path] = os.path.join(outdir, name)
+    return dirs
+
+
+def _read_marker(file_outdir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(file_outdir, DONE_MARKER), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _marker_input(file_outdir: str) -> Optional[str]:
+    done = _read_marker(file_outdir)
+    return done.get("input") if done else None
+
+
+def _fingerprint(input_pdf: str) -> Dict[str, int]:
+    stat = os.stat(input_pdf)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def output_options(options: dict) -> dict:
+    """The OUTPUT_OPTIONS values in a process_file options dict, defaults filled in."""
+    return {name: options.get(name, default) for name, default in OUTPUT_OPTIONS.items()}
+
+
+def read_done_marker(input_pdf: str, file_outdir: str, options: Optional[dict] = None) -> Optional[dict]:
+    """
+    The finished run's summary if file_outdir holds a complete result for this
+    exact input, split with the same output options, else None.
+    """
+    done = _read_marker(file_outdir)
+    if (
+        done is None
+        or done.get("input") != input_pdf
+        or done.get("fingerprint") != _fingerprint(input_pdf)
+        or done.get("options") != output_options(options or {})
+    ):
+        return None
+    return done
+
+
+def _failed_summary(input_pdf: str, file_outdir: str, error: str) -> dict:
+    return {
+        "input": input_pdf, "output_dir": file_outdir, "status": "failed",
+        "pages": 0, "beos": 0, "problem_pages": 0, "seconds": 0, "error": error,
+    }
+
+
+def process_file(
+    input_pdf: str,
+    file_outdir: str,
+    summary_page_count: int = 3,
+    stop_on_problems: bool = False,
+    zip_output: bool = False,
+    ocr: bool = False,
+    extended_report: bool = False,
+    max_open_writers: int = 32,
+) -> dict:
+    """
+    Split one PDF into file_outdir (replacing any earlier output there) and mark it done.
+    Runs in a pool worker; errors are returned in the summary, not raised.
+    Returns: summary dict with the batch_report.csv fields
+    """
+    started = time.perf_counter()
+    summary = {"input": input_pdf, "output_dir": file_outdir, "status": "ok", "error": ""}
+    try:
+        if os.path.isdir(file_outdir):
+            shutil.rmtree(file_outdir)
+        ocr_options = None
+        if ocr:
+            from app.core.ocr import OcrOptions
+            # The batch pool already keeps every core busy
+            ocr_options = OcrOptions(workers=1)
+        results: List[PageResult] = []
+        num_beos, problem_pages, _ = split_pdf(
+            input_pdf,
+            file_outdir,
+            stop_on_problems=stop_on_problems,
+            summary_page_count=summary_page_count,
+            page_results=results,
+            ocr=ocr_options,
+            zip_path=os.path.join(file_outdir, "beos.zip") if zip_output else None,
+            extended_report=extended_report,
+            max_open_writers=max_open_writers,
+        )
+        summary.update(pages=len(results), beos=num_beos, problem_pages=problem_pages)
+    except Exception as e:
+        summary.update(status="failed", pages=0, beos=0, problem_pages=0, error=str(e))
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+
+    if summary["status"] == "ok":
+        options = output_options({
+            "summary_page_count": summary_page_count,
+            "stop_on_problems": stop_on_problems,
+            "zip_output": zip_output,
+            "ocr": ocr,
+            "extended_report": extended_report,
+        })
+        done = {**summary, "fingerprint": _fingerprint(input_pdf), "options": options}
+        tmp_path = os.path.join(file_outdir, DONE_MARKER + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(done, f)
+        os.replace(tmp_path, os.path.join(file_outdir, DONE_MARKER))
+    return summary
+
+
+def write_batch_report(outdir: str, rows: List[dict]) -> str:
+    """Write batch_report.csv (one row per input, in input order)."""
+    report_path = os.path.join(outdir, BATCH_REPORT)
+    with open(report_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+        w.writeheader()
+        for row in rows:
+            seconds = row.get("seconds") or 0
+            w.writerow({**row, "pages_per_sec": round(row["pages"] / seconds, 1) if seconds else 0})
+    return report_path
+
+
+def _print_progress(n: int, total: int, summary: dict, pages: int, elapsed: float):
+    line = f"[{n}/{total}] {summary['status']:<6} {os.path.basename(summary['input'])}"
+    if summary["status"] == "ok":
+        line += f": {summary['pages']} pages, {summary['beos']} BEOs, {summary['problem_pages']} problem pages"
+    else:
+        line += f": {summary['error']}"
+    print(f"{line}  ({pages / elapsed:.1f} pages/sec overall)", flush=True)
+
+
+def run_batch(
+    inputs: List[str],
+    outdir: str,
+    workers: int = 1,
+    resume: bool = False,
+    **options,
+) -> Tuple[List[dict], float]:
+    """
+    Process inputs across a pool of `workers` processes, one file per task.
+    With resume, inputs whose output is already complete (and was split with the
+    same options) are skipped (status "skipped"). A file whose task raises, or
+    that is in flight when a worker process dies (crash, out of memory), is
+    reported as failed; a broken pool is replaced for the remaining inputs.
+    Returns: (summary per input in input order, wall seconds)
+    """
+    os.makedirs(outdir, exist_ok=True)
+    dirs = output_dirs(inputs, outdir)
+    summaries: Dict[str, dict] = {}
+    todo = []
+    for path in inputs:
+        done = read_done_marker(path, dirs[path], options) if resume else None
+        if done is not None:
+            summaries[path] = {**done, "status": "skipped"}
+        else:
+            todo.append(path)
+
+    started = time.perf_counter()
+    pages = 0
+    n = 0
+    pending = deque(todo)
+    size = max(1, min(workers, len(todo)))
+    while pending:
+        with spawn_pool(size) as pool:
+            # Only `size` files in flight, so a dead worker fails those files, not the whole queue.
+            running = {}
+            broken = False
+            while running or (pending and not broken):
+                while pending and not broken and len(running) < size:
+                    path = pending.popleft()
+                    try:
+                        running[pool.submit(process_file, path, dirs[path], **options)] = path
+                    except BrokenProcessPool:
+                        pending.appendleft(path)
+                        broken = True
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path = running.pop(future)
+                    try:
+                        summary = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        summary = _failed_summary(path, dirs[path], "worker process died (crash or out of memory)")
+                    except Exception as e:
+                        summary = _failed_summary(path, dirs[path], f"{type(e).__name__}: {e}")
+                    summaries[path] = summary
+                    pages += summary["pages"]
+                    n += 1
+                    _print_progress(n, len(todo), summary, pages, time.perf_counter() - started)
+    return [summaries[path] for path in inputs], time.perf_counter() - started
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="beo-split",
+        description="Split BEO packet PDFs in bulk, one output directory per input.",
+    )
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns (quote globs)")
+    parser.add_argument("-o", "--outdir", required=True, help="Root directory for per-file outputs and batch_report.csv")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Files processed at once (default: CPU count)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Search directories (and ** globs) recursively")
+    parser.add_argument("--resume", action="store_true", help="Skip inputs whose output is already complete and unchanged")
+    parser.add_argument("--summary-pages", type=int, default=3, help="Leading pages treated as summary (default: 3)")
+    parser.add_argument("--stop-on-problems", action="store_true", help="Only write problem buckets for files with UNKNOWN/AMBIGUOUS pages")
+    parser.add_argument("--zip", action="store_true", help="Write each file's BEOs to beos.zip instead of loose PDFs")
+    parser.add_argument("--ocr", action="store_true", help="OCR UNKNOWN pages with tesseract")
+    parser.add_argument(
+        "--extended-report",
+        action="store_true",
+        help="Per-page rule and timing columns in split_report.csv, plus split_report_summary.csv",
+    )
+    parser.add_argument(
+        "--max-open-writers",
+        type=int,
+        default=32,
+        help="Output PDFs held in memory per file; more spill to disk (default: 32, 0 = no cap)",
+    )
+    args = parser.parse_args(argv)
+
+    inputs = find_inputs(args.inputs, recursive=args.recursive)
+    if not inputs:
+        print("No PDF files found", file=sys.stderr)
+        return 2
+
+    rows, seconds = run_batch(
+        inputs,
+        args.outdir,
+        workers=args.workers,
+        resume=args.resume,
+        summary_page_count=args.summary_pages,
+        stop_on_problems=args.stop_on_problems,
+        zip_output=args.zip,
+        ocr=args.ocr,
+        extended_report=args.extended_report,
+        max_open_writers=args.max_open_writers,
+    )
+    report_path = write_batch_report(args.outdir, rows)
+
+    processed = [r for r in rows if r["status"] != "skipped"]
+    failed = [r for r in rows if r["status"] == "failed"]
+    pages = sum(r["pages"] for r in processed)
+    rate = pages / seconds if seconds else 0.0
+    print(
+        f"{len(processed)} processed, {len(rows) - len(processed)} skipped, {len(failed)} failed; "
+        f"{pages} pages in {seconds:.1f}s = {rate:.1f} pages/sec"
+    )
+    print(f"Report: {report_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,24 @@
 """Core BEO splitting logic adapted from local tool."""
+import bisect
 import csv
 import os
 import re
 import shutil
 import subprocess
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Set, Tuple
+from typing import IO, TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple, Union
 
 import fitz  # PyMuPDF
 
+from app.core.pools import spawn_pool
+
+if TYPE_CHECKING:
+    from app.core.ocr import OcrOptions
+
 
 # Prefer the canonical label used on BEOs: "BEO #: 35325" or "Banquet Event Order: 00201291"
 # Many packets also contain mid-page notes like "Reference BEO# 37057" (no colon),
@@ -24,6 +34,68 @@ BEO_HASH_NO_SPACE_RE = re.compile(r"\bBEO#\s*:\s*(\d{3,})\b", re.IGNORECASE)  #
 BEO_COLON_RE = re.compile(r"\bBEO\s*#\s*:\s*(\d{3,})\b", re.IGNORECASE)  # "BEO #:" with space
 BEO_LOOSE_RE = re.compile(r"\bBEO\s*#?\s*:?\s*(\d{3,})\b", re.IGNORECASE)
 
+# All of the label forms above in one alternation, so each text region is scanned once.
+# Every match is sorted into the labels it satisfies from its named groups:
+#   bo    - BEO_BANQUET_ORDER_RE (colon present)
+#   nl    - BEO_BANQUET_ORDER_NEXT_LINE_RE (newline between label and number)
+#   hash  - BEO_HASH_NO_SPACE_RE ("BEO#:")
+#   colon - BEO_COLON_RE ("BEO #:")
+#   loose - BEO_LOOSE_RE (any "BEO" form)
+BEO_NUMBER_RE = re.compile(
+    # Both forms start with "B" at a word boundary; the lookahead lets the engine
+    # skip every other position without trying the alternation.
+    r"\b(?=b)(?:"
+    r"(?P<order>Banquet\s+Event\s+Order"
+    r"(?P<order_ws1>\s*)(?P<order_colon>:)?(?P<order_ws2>\s*)(?P<order_num>\d{3,})\b)"
+    r"|(?P<beo>BEO(?P<beo_ws>\s*)(?P<beo_hash>#)?\s*(?P<beo_colon>:)?\s*(?P<beo_num>\d{3,})\b))",
+    re.IGNORECASE,
+)
+
+# Priority tiers of the cascade: (rule, region, label). The first tier with any
+# match decides the page: one distinct number is OK, more than one is AMBIGUOUS.
+MATCH_TIERS: Tuple[Tuple[str, str, str], ...] = (
+    # 1) Strongest signal: "Banquet Event Order:" in header/footer (common format).
+    ("hf_banquet_order", "hf", "bo"),
+    # 2) "Banquet Event Order:" anywhere on page.
+    ("full_banquet_order", "full", "bo"),
+    # 2a) "Banquet Event Order" with number on next line (first page of BEO).
+    ("hf_banquet_order_next_line", "hf", "nl"),
+    ("full_banquet_order_next_line", "full", "nl"),
+    # 2b) "BEO #:" / "BEO#:" in upper-left only (continuation pages: "BEO #: N" in corner).
+    #     Same number as "Banquet Event Order" on first page -> group together.
+    ("upper_left_colon", "ul", "colon"),
+    ("upper_left_loose", "ul", "loose"),
+    # 3) "BEO#:" (no space) in header/footer - common in Banquet Checks.
+    ("hf_hash_no_space", "hf", "hash"),
+    # 4) "BEO#:" (no space) anywhere on page.
+    ("full_hash_no_space", "full", "hash"),
+    # 5) "BEO #:" colon form in header/footer.
+    ("hf_colon", "hf", "colon"),
+    # 6) "BEO #:" colon form anywhere on page (header/footer blocks not detected cleanly).
+    ("full_colon", "full", "colon"),
+    # 7) Fallback: loose "BEO #" match in header/footer (rare templates without colon).
+    ("hf_loose", "hf", "loose"),
+    # 8) Last resort: loose match on page, but ignore lines that look like references/notes.
+    ("full_loose_unreferenced", "full", "loose_line"),
+)
+
+# Characters str.splitlines() treats as line boundaries.
+_LINE_BREAK_RE = re.compile(r"\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+# Page regions searched before the full text, as fractions of the page size.
+HEADER_FOOTER_MARGIN_RATIO = 0.18  # top and bottom bands
+UPPER_LEFT_WIDTH_RATIO = 0.4  # continuation pages put "BEO #: N" in this corner
+UPPER_LEFT_HEIGHT_RATIO = 0.22
+
+# Bump whenever classification or output changes, so cached results are not reused.
+SPLITTER_VERSION = "3"
+
+# A PDF given by path, or its content already in memory (e.g. an upload)
+PdfSource = Union[str, bytes, bytearray, memoryview]
+
+# In-memory input of this pool worker process (see source_pool)
+_pool_source: Optional[bytes] = None
+
 REFERENCE_LINE_HINTS = (
     "REFERENCE",
     "REFER TO",
@@ -42,55 +114,85 @@ class PageResult:
     status: str  # OK | UNKNOWN | AMBIGUOUS
     beo: str  # empty unless OK
     matches: str  # comma-separated unique matches (for debugging)
+    extract_ms: float = 0.0  # text extraction time for this page
+    classify_ms: float = 0.0  # extraction + BEO matching time for this page
+    text_chars: int = 0  # length of the stripped page text; 0 = no text layer
+    rule: str = ""  # MATCH_TIERS rule that decided the page; empty if nothing matched
+    match_ms: float = 0.0  # BEO matching (cascade) time for this page
+    text_layer: Optional[bool] = None  # page had extractable text; None for summary pages
+    ocr: bool = False  # result comes from OCR'd text
 
 
-def _extract_all_text(page: "fitz.Page") -> str:
-    """Best-effort full-page text extraction."""
-    txt = page.get_text("text") or ""
-    if txt.strip():
-        return txt
-    blocks = page.get_text("blocks") or []
+@dataclass(frozen=True)
+class PageText:
+    """
+    Text model for one page, built from a single get_text("blocks") call.
+    Full text, header/footer text and upper-left text are all derived from
+    the same block list so each page is only extracted once.
+    """
+    full_text: str
+    hf_text: str
+    upper_left_text: str
+    extract_seconds: float  # wall time spent in PyMuPDF text extraction
+
+
+def _block_text(b: tuple) -> Optional[str]:
+    # (x0, y0, x1, y1, text, block_no, block_type)
+    if len(b) < 5 or not isinstance(b[4], str):
+        return None
+    return b[4]
+
+
+def _extract_all_text(blocks: List[tuple]) -> str:
+    """Best-effort full-page text, equivalent to get_text("text") for text blocks."""
     parts: List[str] = []
     for b in blocks:
-        if len(b) >= 5 and isinstance(b[4], str):
-            parts.append(b[4])
-    return "\n".join(parts)
+        txt = _block_text(b)
+        if txt is None:
+            continue
+        # Image blocks carry a "<image: ...>" placeholder that get_text("text") omits.
+        if len(b) >= 7 and b[6] != 0:
+            continue
+        parts.append(txt if txt.endswith("\n") else txt + "\n")
+    return "".join(parts)
 
 
-def _extract_header_footer_text(page: "fitz.Page", margin_ratio: float = 0.18) -> str:
+def _extract_header_footer_text(
+    blocks: List[tuple],
+    rect: "fitz.Rect",
+    margin_ratio: float = HEADER_FOOTER_MARGIN_RATIO,
+) -> str:
     """
     Extract text from the top/bottom of the page only.
     This helps avoid false ambiguity from mid-page notes referencing other BEOs.
     """
-    rect = page.rect
     height = float(rect.height) if rect and rect.height else 0.0
     if height <= 0:
         return ""
     top_y = height * margin_ratio
     bottom_y = height * (1.0 - margin_ratio)
 
-    blocks = page.get_text("blocks") or []
     parts: List[str] = []
     for b in blocks:
-        # (x0, y0, x1, y1, text, block_no, block_type)
-        if len(b) < 5 or not isinstance(b[4], str):
+        txt = _block_text(b)
+        if txt is None:
             continue
         y0, y1 = float(b[1]), float(b[3])
         if y1 <= top_y or y0 >= bottom_y:
-            parts.append(b[4])
+            parts.append(txt)
     return "\n".join(parts)
 
 
 def _extract_upper_left_text(
-    page: "fitz.Page",
-    width_ratio: float = 0.4,
-    height_ratio: float = 0.22,
+    blocks: List[tuple],
+    rect: "fitz.Rect",
+    width_ratio: float = UPPER_LEFT_WIDTH_RATIO,
+    height_ratio: float = UPPER_LEFT_HEIGHT_RATIO,
 ) -> str:
     """
     Extract text from the upper-left corner of the page only.
     Continuation pages often have "BEO #: N" only in this region.
     """
-    rect = page.rect
     w = float(rect.width) if rect and rect.width else 0.0
     h = float(rect.height) if rect and rect.height else 0.0
     if w <= 0 or h <= 0:
@@ -98,241 +200,792 @@ def _extract_upper_left_text(
     max_x = w * width_ratio
     max_y = h * height_ratio
 
-    blocks = page.get_text("blocks") or []
     parts: List[str] = []
     for b in blocks:
-        if len(b) < 5 or not isinstance(b[4], str):
+        txt = _block_text(b)
+        if txt is None:
             continue
-        x0, y0, x1, y1 = float(b[0]), float(b[1]), float(b[2]), float(b[3])
+        x1, y1 = float(b[2]), float(b[3])
         if x1 <= max_x and y1 <= max_y:
-            parts.append(b[4])
+            parts.append(txt)
     return "\n".join(parts)
 
 
-def _matches_from_text(regex: "re.Pattern[str]", text: str) -> Set[str]:
-    return set(regex.findall(text or ""))
+def page_text_from_blocks(blocks: List[tuple], rect: "fitz.Rect", extract_seconds: float = 0.0) -> PageText:
+    """Derive every text region from one list of (x0, y0, x1, y1, text, ...) blocks."""
+    return PageText(
+        full_text=_extract_all_text(blocks),
+        hf_text=_extract_header_footer_text(blocks, rect),
+        upper_left_text=_extract_upper_left_text(blocks, rect),
+        extract_seconds=extract_seconds,
+    )
+
+
+def load_page_text(page: "fitz.Page") -> PageText:
+    """Extract a page's blocks once and derive every text region from them."""
+    t0 = time.perf_counter()
+    blocks = page.get_text("blocks") or []
+    return page_text_from_blocks(blocks, page.rect, time.perf_counter() - t0)
+
+
+def _scan_region(text: str) -> Dict[str, Set[str]]:
+    """
+    Scan one text region with BEO_NUMBER_RE and bucket the numbers by label.
+    Loose matches are also kept as (start, number, single_line) under "_loose_at"
+    so the reference-line filter only runs if the last tier is reached.
+    """
+    bo: Set[str] = set()
+    nl: Set[str] = set()
+    hash_: Set[str] = set()
+    colon: Set[str] = set()
+    loose: Set[str] = set()
+    loose_at: List[Tuple[int, str, bool]] = []
+    for m in BEO_NUMBER_RE.finditer(text or ""):
+        if m.group("order"):
+            num = m.group("order_num")
+            if m.group("order_colon"):
+                bo.add(num)
+                gap = m.group("order_ws2")
+            else:
+                gap = m.group("order_ws1") + m.group("order_ws2")
+            if "\n" in gap:
+                nl.add(num)
+            continue
+
+        num = m.group("beo_num")
+        loose.add(num)
+        loose_at.append((m.start(), num, _LINE_BREAK_RE.search(m.group(0)) is None))
+        if m.group("beo_hash") and m.group("beo_colon"):
+            colon.add(num)
+            if not m.group("beo_ws"):
+                hash_.add(num)
+    return {"bo": bo, "nl": nl, "hash": hash_, "colon": colon, "loose": loose, "_loose_at": loose_at}
+
+
+def _unreferenced_loose(text: str, loose_at: List[Tuple[int, str, bool]]) -> Set[str]:
+    """Loose matches confined to one line whose line has no REFERENCE_LINE_HINTS."""
+    candidates: Set[str] = set()
+    if not loose_at:
+        return candidates
+    line_starts = [0] + [lb.end() for lb in _LINE_BREAK_RE.finditer(text)]
+    for start, num, single_line in loose_at:
+        if not single_line:
+            continue
+        i = bisect.bisect_right(line_starts, start) - 1
+        line_end = line_starts[i + 1] if i + 1 < len(line_starts) else len(text)
+        line = text[line_starts[i]:line_end].upper()
+        if not any(h in line for h in REFERENCE_LINE_HINTS):
+            candidates.add(num)
+    return candidates
+
+
+def match_beo_number(page_text: PageText) -> Tuple[Optional[str], str, Set[str], str]:
+    """
+    Run the MATCH_TIERS cascade over a page's text regions.
+    Each region is scanned at most once, and only when a tier needs it.
+    Returns (beo, status, matches, rule); rule is empty when nothing matched.
+    """
+    regions = {
+        "hf": page_text.hf_text,
+        "ul": page_text.upper_left_text,
+        "full": page_text.full_text,
+    }
+    scanned: Dict[str, dict] = {}
+    for rule, region, label in MATCH_TIERS:
+        found = scanned.get(region)
+        if found is None:
+            found = scanned[region] = _scan_region(regions[region])
+        if label == "loose_line":
+            m = _unreferenced_loose(regions[region], found["_loose_at"])
+        else:
+            m = found[label]
+        if len(m) == 1:
+            return next(iter(m)), "OK", m, rule
+        if len(m) > 1:
+            return None, "AMBIGUOUS", m, rule
+    return None, "UNKNOWN", set(), ""
 
 
-def _is_banquet_check(page: "fitz.Page") -> bool:
+def _is_banquet_check(page_text: PageText) -> bool:
     """Detect if this page is a Banquet Check (vs regular BEO)."""
-    full_text = _extract_all_text(page).upper()
+    full_text = page_text.full_text.upper()
     # Look for "Banquet Check" text which appears on Banquet Checks
     return "BANQUET CHECK" in full_text or "BANQUETCHECK" in full_text.replace(" ", "")
 
 
-def extract_single_beo_from_page(page: "fitz.Page") -> Tuple[Optional[str], str, Set[str]]:
+def extract_single_beo_from_page(
+    page: "fitz.Page",
+    page_text: Optional[PageText] = None,
+) -> Tuple[Optional[str], str, Set[str]]:
     """
     Returns (beo, status, matches).
     Status:
       - OK: exactly one distinct BEO detected
       - UNKNOWN: none detected
       - AMBIGUOUS: multiple distinct detected (should be reviewed)
+    Pass page_text when the page has already been extracted to avoid a second pass.
     """
-    hf_text = _extract_header_footer_text(page)
-    upper_left_text = _extract_upper_left_text(page)
-    full_text = _extract_all_text(page)
+    if page_text is None:
+        page_text = load_page_text(page)
+    beo, status, matches, _rule = match_beo_number(page_text)
+    return beo, status, matches
 
-    # 1) Strongest signal: "Banquet Event Order:" in header/footer (common format).
-    m = _matches_from_text(BEO_BANQUET_ORDER_RE, hf_text)
-    if len(m) == 1:
-        return next(iter(m)), "OK", m
-    if len(m) > 1:
-        return None, "AMBIGUOUS", m
 
-    # 2) "Banquet Event Order:" anywhere on page.
-    m = _matches_from_text(BEO_BANQUET_ORDER_RE, full_text)
-    if len(m) == 1:
-        return next(iter(m)), "OK", m
-    if len(m) > 1:
-        return None, "AMBIGUOUS", m
-
-    # 2a) "Banquet Event Order" with number on next line (first page of BEO) — header/footer then full page.
-    m = _matches_from_text(BEO_BANQUET_ORDER_NEXT_LINE_RE, hf_text)
-    if len(m) == 1:
-        return next(iter(m)), "OK", m
-    if len(m) > 1:
-        return None, "AMBIGUOUS", m
-    m = _matches_from_text(BEO_BANQUET_ORDER_NEXT_LINE_RE, full_text)
-    if len(m) == 1:
-        return next(iter(m)), "OK", m
-    if len(m) > 1:
-        return None, "AMBIGUOUS", m
-
-    # 2b) "BEO #" / "BEO#:" in upper-left only (continuation pages: "BEO #: N" in corner).
-    #     Same number as "Banquet Event Order" on first page → group together.
-    m_ul = _matches_from_text(BEO_COLON_RE, upper_left_text) | _matches_from_text(
-        BEO_HASH_NO_SPACE_RE, upper_left_text
-    )
-    if len(m_ul) == 1:
-        return next(iter(m_ul)), "OK", m_ul
-    if len(m_ul) > 1:
-        return None, "AMBIGUOUS", m_ul
-    m_ul_loose = _matches_from_text(BEO_LOOSE_RE, upper_left_text)
-    if len(m_ul_loose) == 1:
-        return next(iter(m_ul_loose)), "OK", m_ul_loose
-    if len(m_ul_loose) > 1:
-        return None, "AMBIGUOUS", m_ul_loose
+REPORT_FIELDS = ["page", "status", "beo", "matches"]
+# Extra split_report.csv columns written with extended=True
+EXTENDED_REPORT_FIELDS = ["rule", "source", "text_layer", "text_chars", "extract_us", "match_us", "classify_us"]
+REPORT_SUMMARY_FIELDS = [
+    "rule", "pages", "ok", "ambiguous", "unknown", "ocr_pages", "textless_pages",
+    "total_ms", "share", "mean_extract_us", "mean_match_us", "mean_classify_us",
+    "p95_classify_us", "max_classify_us", "mean_text_chars",
+]
 
-    # 3) "BEO#:" (no space) in header/footer - common in Banquet Checks.
-    m = _matches_from_text(BEO_HASH_NO_SPACE_RE, hf_text)
-    if len(m) == 1:
-        return next(iter(m)), "OK", m
-    if len(m) > 1:
-        return None, "AMBIGUOUS", m
 
-    # 4) "BEO#:" (no space) anywhere on page.
-    m = _matches_from_text(BEO_HASH_NO_SPACE_RE, full_text)
-    if len(m) == 1:
-        return next(iter(m)), "OK", m
-    if len(m) > 1:
-        return None, "AMBIGUOUS", m
+def _page_source(r: PageResult) -> str:
+    if r.matches == "(summary)":
+        return "summary"
+    return "ocr" if r.ocr else "text"
 
-    # 5) "BEO #:" colon form in header/footer.
-    m = _matches_from_text(BEO_COLON_RE, hf_text)
-    if len(m) == 1:
-        return next(iter(m)), "OK", m
-    if len(m) > 1:
-        return None, "AMBIGUOUS", m
-
-    # 6) "BEO #:" colon form anywhere on page (handles layouts where header/footer blocks aren't detected cleanly).
-    m = _matches_from_text(BEO_COLON_RE, full_text)
-    if len(m) == 1:
-        return next(iter(m)), "OK", m
-    if len(m) > 1:
-        return None, "AMBIGUOUS", m
 
-    # 7) Fallback: loose "BEO #" match in header/footer (rare templates without colon).
-    m = _matches_from_text(BEO_LOOSE_RE, hf_text)
-    if len(m) == 1:
-        return next(iter(m)), "OK", m
-    if len(m) > 1:
-        return None, "AMBIGUOUS", m
+def write_report_csv(outdir: str, results: List[PageResult], extended: bool = False) -> str:
+    """
+    Write the split report CSV file.
+    With extended, each row also has the rule that decided the page, where its text
+    came from (text/ocr/summary), whether it had a text layer, its text length and
+    its extraction/match/total classification time in microseconds.
+    """
+    report_path = os.path.join(outdir, "split_report.csv")
+    fieldnames = REPORT_FIELDS + EXTENDED_REPORT_FIELDS if extended else REPORT_FIELDS
+    with open(report_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fieldnames)
+        w.writeheader()
+        for r in results:
+            row = {
+                "page": r.page_number,
+                "status": r.status,
+                "beo": r.beo,
+                "matches": r.matches,
+            }
+            if extended:
+                row.update(
+                    rule=r.rule,
+                    source=_page_source(r),
+                    text_layer="" if r.text_layer is None else int(r.text_layer),
+                    text_chars=r.text_chars,
+                    extract_us=round(r.extract_ms * 1000),
+                    match_us=round(r.match_ms * 1000),
+                    classify_us=round(r.classify_ms * 1000),
+                )
+            w.writerow(row)
+    return report_path
 
-    # 8) Last resort: loose match on page, but ignore lines that look like references/notes.
-    #    This keeps verification strict while supporting occasional template variations.
-    candidates: Set[str] = set()
-    for line in (full_text or "").splitlines():
-        u = line.upper()
-        if any(h in u for h in REFERENCE_LINE_HINTS):
+
+def summarize_report(results: List[PageResult]) -> List[Dict[str, object]]:
+    """
+    Aggregate per-page profiling by deciding rule (a proxy for the page template),
+    hottest first: pages, outcome counts, total and share of classification time,
+    and mean/p95/max timings. Pages no rule matched are grouped as "(none)";
+    summary pages are left out.
+    """
+    groups: Dict[str, List[PageResult]] = {}
+    for r in results:
+        if r.matches == "(summary)":
             continue
-        candidates |= _matches_from_text(BEO_LOOSE_RE, line)
+        groups.setdefault(r.rule or "(none)", []).append(r)
+    total_ms = sum(r.classify_ms for rs in groups.values() for r in rs)
 
-    if len(candidates) == 1:
-        return next(iter(candidates)), "OK", candidates
-    if len(candidates) == 0:
-        return None, "UNKNOWN", set()
-    return None, "AMBIGUOUS", candidates
+    rows = []
+    for rule, rs in groups.items():
+        n = len(rs)
+        classify_us = sorted(r.classify_ms * 1000 for r in rs)
+        group_ms = sum(r.classify_ms for r in rs)
+        rows.append({
+            "rule": rule,
+            "pages": n,
+            "ok": sum(1 for r in rs if r.status == "OK"),
+            "ambiguous": sum(1 for r in rs if r.status == "AMBIGUOUS"),
+            "unknown": sum(1 for r in rs if r.status == "UNKNOWN"),
+            "ocr_pages": sum(1 for r in rs if r.ocr),
+            "textless_pages": sum(1 for r in rs if r.text_layer is False),
+            "total_ms": round(group_ms, 3),
+            "share": round(group_ms / total_ms, 4) if total_ms else 0.0,
+            "mean_extract_us": round(sum(r.extract_ms for r in rs) * 1000 / n),
+            "mean_match_us": round(sum(r.match_ms for r in rs) * 1000 / n),
+            "mean_classify_us": round(group_ms * 1000 / n),
+            "p95_classify_us": round(classify_us[min(n - 1, int(n * 0.95))]),
+            "max_classify_us": round(classify_us[-1]),
+            "mean_text_chars": round(sum(r.text_chars for r in rs) / n),
+        })
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows
 
 
-def write_report_csv(outdir: str, results: List[PageResult]) -> str:
-    """Write the split report CSV file."""
-    report_path = os.path.join(outdir, "split_report.csv")
-    with open(report_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=["page", "status", "beo", "matches"])
+def write_report_summary_csv(outdir: str, results: List[PageResult]) -> str:
+    """Write split_report_summary.csv (see summarize_report)."""
+    summary_path = os.path.join(outdir, "split_report_summary.csv")
+    with open(summary_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=REPORT_SUMMARY_FIELDS)
         w.writeheader()
-        for r in results:
-            w.writerow(
-                {
-                    "page": r.page_number,
-                    "status": r.status,
-                    "beo": r.beo,
-                    "matches": r.matches,
-                }
+        w.writerows(summarize_report(results))
+    return summary_path
+
+
+def classify_page_text(page_number: int, page_text: PageText, started: float) -> PageResult:
+    """Build a page's PageResult from its text; started is the perf_counter() time work on the page began."""
+    match_started = time.perf_counter()
+    beo, status, matches, rule = match_beo_number(page_text)
+    finished = time.perf_counter()
+    text_chars = len(page_text.full_text.strip())
+    info = {
+        "extract_ms": page_text.extract_seconds * 1000.0,
+        "classify_ms": (finished - started) * 1000.0,
+        "text_chars": text_chars,
+        "rule": rule,
+        "match_ms": (finished - match_started) * 1000.0,
+        "text_layer": text_chars > 0,
+    }
+
+    if status == "OK" and beo:
+        return PageResult(page_number, "OK", beo, ",".join(sorted(matches)), **info)
+    if status == "UNKNOWN":
+        return PageResult(page_number, "UNKNOWN", "", "", **info)
+    # AMBIGUOUS
+    return PageResult(page_number, "AMBIGUOUS", "", ",".join(sorted(matches)), **info)
+
+
+def classify_pages(
+    doc: "fitz.Document",
+    summary_page_count: int = 3,
+    start: int = 0,
+    stop: Optional[int] = None,
+    on_page: Optional[Callable[[PageResult], None]] = None,
+) -> List[PageResult]:
+    """
+    Classify pages [start, stop) of an open document into PageResults.
+    Each page is extracted once; per-page timings are recorded on the result.
+    First summary_page_count pages are treated as summary (no BEO); they go to UNKNOWN.
+    on_page, if given, is called with each result as soon as it is known.
+    """
+    if stop is None:
+        stop = doc.page_count
+
+    results: List[PageResult] = []
+    for idx in range(start, stop):
+        page_number = idx + 1
+
+        # First N pages are summary of event orders; do not assign to a BEO.
+        if summary_page_count > 0 and page_number <= summary_page_count:
+            result = PageResult(page_number, "UNKNOWN", "", "(summary)")
+        else:
+            t0 = time.perf_counter()
+            page_text = load_page_text(doc.load_page(idx))
+            result = classify_page_text(page_number, page_text, t0)
+        results.append(result)
+        if on_page is not None:
+            on_page(result)
+    return results
+
+
+def open_pdf(source: Optional[PdfSource]) -> "fitz.Document":
+    """
+    Open a PDF from a path or from memory without copying it to disk.
+    None opens the in-memory input this pool worker was started with (see source_pool).
+    """
+    if source is None:
+        source = _pool_source
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _set_pool_source(source: bytes):
+    global _pool_source
+    _pool_source = source
+
+
+def source_pool(input_pdf: PdfSource, workers: int) -> Tuple[ProcessPoolExecutor, Optional[str]]:
+    """
+    A process pool for work on input_pdf, and the input its tasks should pass to open_pdf.
+    A path is passed with every task; in-memory input is sent once to each
+    worker process instead of with every task (tasks pass None).
+    Returns: (pool, task input)
+    """
+    if isinstance(input_pdf, str):
+        return spawn_pool(workers), input_pdf
+    return spawn_pool(workers, initializer=_set_pool_source, initargs=(bytes(input_pdf),)), None
+
+
+def pdf_bytes(doc: "fitz.Document", garbage: int = 0) -> bytes:
+    """
+    Serialize doc in memory. Document.tobytes() goes through a Python callback per
+    write and is several times slower than save() to a file; writing into a MuPDF
+    buffer is as fast. Falls back to tobytes() without the low-level bindings.
+    """
+    try:
+        from pymupdf import mupdf
+    except ImportError:
+        return doc.tobytes(garbage=garbage)
+    buffer = mupdf.fz_new_buffer(64 * 1024)
+    out = mupdf.FzOutput(buffer)
+    options = mupdf.PdfWriteOptions()
+    options.do_garbage = garbage
+    mupdf.pdf_write_document(mupdf.pdf_specifics(doc.this), out, options)
+    out.fz_close_output()
+    return buffer.fz_buffer_extract()
+
+
+def _classify_chunk(args: Tuple[Optional[str], int, int, int]) -> List[PageResult]:
+    """Process-pool worker: open the PDF in this process and classify one page range."""
+    input_pdf, summary_page_count, start, stop = args
+    doc = open_pdf(input_pdf)
+    try:
+        return classify_pages(doc, summary_page_count, start, stop)
+    finally:
+        doc.close()
+
+
+def classify_pages_parallel(
+    input_pdf: PdfSource,
+    page_count: int,
+    summary_page_count: int = 3,
+    workers: int = 2,
+    chunks_per_worker: int = 4,
+    on_page: Optional[Callable[[PageResult], None]] = None,
+) -> List[PageResult]:
+    """
+    Classify all pages of input_pdf across a process pool.
+    The page range is cut into contiguous chunks; each worker opens its own
+    fitz document, and chunk results are merged back in page order, so the
+    output is identical to classify_pages() on the whole document.
+    on_page is called with each PageResult in page order, a chunk at a time as
+    the chunks complete (in order).
+    """
+    n_chunks = max(1, min(page_count, workers * chunks_per_worker))
+    bounds = [page_count * i // n_chunks for i in range(n_chunks + 1)]
+    pool, task_input = source_pool(input_pdf, workers)
+    tasks = [
+        (task_input, summary_page_count, bounds[i], bounds[i + 1])
+        for i in range(n_chunks)
+        if bounds[i] < bounds[i + 1]
+    ]
+    results: List[PageResult] = []
+    with pool:
+        for chunk in pool.map(_classify_chunk, tasks):
+            results.extend(chunk)
+            if on_page is not None:
+                for r in chunk:
+                    on_page(r)
+    return results
+
+
+def is_banquet_check_document(doc: "fitz.Document") -> bool:
+    """Detect if this is a Banquet Check document by checking first page."""
+    if doc.page_count == 0:
+        return False
+    return _is_banquet_check(load_page_text(doc.load_page(0)))
+
+
+@dataclass(frozen=True)
+class SplitAnalysis:
+    """Classification of a packet without any output written (see analyze_pdf)."""
+    page_count: int
+    is_banquet_check: bool
+    results: Tuple[PageResult, ...]
+
+    @property
+    def classified_pages(self) -> int:
+        """Pages that were classified (everything but the summary pages)."""
+        return sum(1 for r in self.results if r.matches != "(summary)")
+
+    @property
+    def text_pages(self) -> int:
+        """Classified pages that have a text layer."""
+        return sum(1 for r in self.results if r.matches != "(summary)" and r.text_chars > 0)
+
+    @property
+    def unknown_pages(self) -> int:
+        """Classified pages with no BEO number found."""
+        return sum(1 for r in self.results if r.matches != "(summary)" and r.status == "UNKNOWN")
+
+    @property
+    def beo_count(self) -> int:
+        return len({r.beo for r in self.results if r.status == "OK" and r.beo})
+
+    @property
+    def text_coverage(self) -> float:
+        """Fraction of classified pages with a text layer (1.0 for a packet of only summary pages)."""
+        classified = self.classified_pages
+        return self.text_pages / classified if classified else 1.0
+
+    @property
+    def recommended_path(self) -> str:
+        """
+        digital: every classified page has a text layer; no OCR needed
+        ocr:     no classified page has a text layer
+        hybrid:  a mix; only the pages without text need OCR
+        """
+        if self.text_pages == self.classified_pages:
+            return "digital"
+        if self.text_pages == 0:
+            return "ocr"
+        return "hybrid"
+
+    def coverage_report(self) -> Dict[str, object]:
+        """Summary of the text layer and classification, for logs and path selection."""
+        return {
+            "page_count": self.page_count,
+            "classified_pages": self.classified_pages,
+            "text_pages": self.text_pages,
+            "text_coverage": round(self.text_coverage, 4),
+            "unknown_pages": self.unknown_pages,
+            "beo_count": self.beo_count,
+            "recommended_path": self.recommended_path,
+        }
+
+
+def analyze_pdf(
+    input_pdf: PdfSource,
+    summary_page_count: int = 3,
+    workers: int = 1,
+    parallel_min_pages: int = 200,
+    on_page: Optional[Callable[[PageResult], None]] = None,
+) -> SplitAnalysis:
+    """
+    Classify every page and measure text-layer coverage without writing any PDFs.
+    Pass the result to split_pdf(analysis=...) to write outputs without classifying again.
+    With on_page (called with each PageResult in page order), results can be acted
+    on while the scan continues: page by page when serial, a chunk at a time when parallel.
+    input_pdf may be a path or the PDF's bytes.
+    """
+    doc = open_pdf(input_pdf)
+    try:
+        is_banquet_check = is_banquet_check_document(doc)
+        if workers > 1 and doc.page_count >= parallel_min_pages:
+            results = classify_pages_parallel(
+                input_pdf, doc.page_count, summary_page_count, workers, on_page=on_page
             )
-    return report_path
+        else:
+            results = classify_pages(doc, summary_page_count, on_page=on_page)
+        return SplitAnalysis(doc.page_count, is_banquet_check, tuple(results))
+    finally:
+        doc.close()
+
+
+# Output buckets for pages that could not be assigned to a single BEO.
+PROBLEM_BUCKETS = ("UNKNOWN", "AMBIGUOUS")
+
+# select() keeps every object of the input copy; save with garbage collection
+# (and duplicate removal) so those documents only carry what their pages use.
+SELECT_SAVE_GARBAGE = 2
+
+
+def page_bucket(result: PageResult) -> str:
+    """Output bucket of a page: its BEO number, or UNKNOWN / AMBIGUOUS."""
+    if result.status == "OK" and result.beo:
+        return result.beo
+    return "AMBIGUOUS" if result.status == "AMBIGUOUS" else "UNKNOWN"
+
+
+def plan_page_runs(results: List[PageResult]) -> List[Tuple[str, int, int]]:
+    """
+    Coalesce the page -> bucket plan into runs of consecutive pages.
+    Returns (bucket, first_idx, last_idx) tuples with 0-based inclusive page indexes.
+    """
+    runs: List[Tuple[str, int, int]] = []
+    for r in results:
+        bucket = page_bucket(r)
+        idx = r.page_number - 1
+        if runs and runs[-1][0] == bucket and runs[-1][2] == idx - 1:
+            runs[-1] = (bucket, runs[-1][1], idx)
+        else:
+            runs.append((bucket, idx, idx))
+    return runs
+
+
+def build_bucket_docs(
+    doc: "fitz.Document",
+    runs: List[Tuple[str, int, int]],
+    input_pdf: Optional[PdfSource] = None,
+) -> Dict[str, "fitz.Document"]:
+    """
+    Build one output document per bucket with a single insert_pdf call per run.
+    If input_pdf is given, buckets made of more than one run are built by opening
+    a fresh copy of the input and select()-ing their pages instead.
+    Buckets are returned in order of first appearance.
+    """
+    bucket_runs: Dict[str, List[Tuple[int, int]]] = {}
+    for bucket, first, last in runs:
+        bucket_runs.setdefault(bucket, []).append((first, last))
+
+    outputs: Dict[str, fitz.Document] = {}
+    for bucket, spans in bucket_runs.items():
+        if input_pdf is not None and len(spans) > 1:
+            outdoc = open_pdf(input_pdf)
+            outdoc.select([i for first, last in spans for i in range(first, last + 1)])
+        else:
+            outdoc = fitz.open()
+            for first, last in spans:
+                # Page range is inclusive.
+                outdoc.insert_pdf(doc, from_page=first, to_page=last)
+        outputs[bucket] = outdoc
+    return outputs
+
+
+def write_bucket_runs_bounded(
+    doc: "fitz.Document",
+    runs: List[Tuple[str, int, int]],
+    emit: Callable[[str, "fitz.Document"], None],
+    max_open: int,
+    spill_dir: str,
+) -> List[str]:
+    """
+    Memory-bounded build_bucket_docs: copy the runs in page order and call
+    emit(bucket, outdoc) as soon as a bucket's last run is copied, then close it,
+    so only buckets that reappear later stay open. At most max_open documents
+    are kept open; beyond that the least recently used one is saved to spill_dir
+    and closed, then reopened when its bucket reappears and saved back with
+    saveIncr() (appending only the new pages) if it has to be evicted again.
+    Returns: buckets in the order they were emitted
+    """
+    last_run = {bucket: i for i, (bucket, _, _) in enumerate(runs)}
+    open_docs: "OrderedDict[str, fitz.Document]" = OrderedDict()
+    spilled: Dict[str, str] = {}
+    emitted: List[str] = []
+    try:
+        for i, (bucket, first, last) in enumerate(runs):
+            outdoc = open_docs.pop(bucket, None)
+            if outdoc is None:
+                outdoc = fitz.open(spilled[bucket]) if bucket in spilled else fitz.open()
+            # Page range is inclusive.
+            outdoc.insert_pdf(doc, from_page=first, to_page=last)
+            if last_run[bucket] == i:
+                emit(bucket, outdoc)
+                outdoc.close()
+                if bucket in spilled:
+                    os.remove(spilled.pop(bucket))
+                emitted.append(bucket)
+                continue
+            open_docs[bucket] = outdoc
+            while len(open_docs) > max(1, max_open):
+                evicted, evicted_doc = open_docs.popitem(last=False)
+                if evicted in spilled:
+                    evicted_doc.saveIncr()
+                else:
+                    os.makedirs(spill_dir, exist_ok=True)
+                    spilled[evicted] = os.path.join(spill_dir, f"{evicted}.pdf")
+                    evicted_doc.save(spilled[evicted])
+                evicted_doc.close()
+    finally:
+        for outdoc in open_docs.values():
+            outdoc.close()
+        if os.path.isdir(spill_dir):
+            shutil.rmtree(spill_dir, ignore_errors=True)
+    return emitted
+
+
+def _page_runs(indexes: List[int]) -> List[Tuple[int, int]]:
+    """Group sorted 0-based page indexes into inclusive (first, last) runs."""
+    runs: List[Tuple[int, int]] = []
+    for idx in indexes:
+        if runs and idx == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], idx)
+        else:
+            runs.append((idx, idx))
+    return runs
+
+
+class IncrementalBeoWriter:
+    """
+    Writes each BEO to outdir as soon as its pages are complete, for progressive results.
+    Feed PageResults in page order with add() (e.g. as analyze_pdf's on_page); a BEO
+    is written when a page of a different BEO follows it. Packets are ordered, so
+    that is almost always final; a BEO that reappears later is rewritten with all
+    its pages when that run ends. finish(results) writes the last BEO and rewrites
+    any whose pages changed (e.g. after OCR), so the last on_beo(filename, path)
+    call for each file has its final content. Files are replaced atomically, so a
+    reader never sees a partial file.
+    """
+
+    def __init__(self, input_pdf: PdfSource, outdir: str, on_beo: Callable[[str, str], None]):
+        os.makedirs(outdir, exist_ok=True)
+        self.input_pdf = input_pdf
+        self.outdir = outdir
+        self.on_beo = on_beo
+        self.doc = open_pdf(input_pdf)
+        self.file_prefix = "BC_" if is_banquet_check_document(self.doc) else "BEO_"
+        self._pages: Dict[str, List[int]] = {}  # beo -> 0-based page indexes so far
+        self._written: Dict[str, Tuple[int, ...]] = {}
+        self._current: Optional[str] = None
+
+    def add(self, result: PageResult):
+        bucket = page_bucket(result)
+        if bucket in PROBLEM_BUCKETS:
+            # UNKNOWN/AMBIGUOUS pages do not end the current BEO's run.
+            return
+        if bucket != self._current:
+            if self._current is not None:
+                self._write(self._current, self._pages[self._current])
+            self._current = bucket
+        self._pages.setdefault(bucket, []).append(result.page_number - 1)
+
+    def _write(self, beo: str, indexes: List[int]):
+        pages = tuple(indexes)
+        if self._written.get(beo) == pages:
+            return
+        outdoc = fitz.open()
+        for first, last in _page_runs(list(pages)):
+            outdoc.insert_pdf(self.doc, from_page=first, to_page=last)
+        filename = f"{self.file_prefix}{beo}.pdf"
+        path = os.path.join(self.outdir, filename)
+        outdoc.save(path + ".tmp")
+        outdoc.close()
+        os.replace(path + ".tmp", path)
+        self._written[beo] = pages
+        self.on_beo(filename, path)
+
+    def finish(self, results: Optional[List[PageResult]] = None, input_pdf: Optional[PdfSource] = None):
+        """
+        Write whatever is still pending. With the final results, rewrite BEOs whose
+        pages differ from what was written; with a different input_pdf (e.g. the
+        OCR'd copy), rewrite every BEO from that file.
+        """
+        if input_pdf is not None and input_pdf != self.input_pdf:
+            self.doc.close()
+            self.doc = open_pdf(input_pdf)
+            self.input_pdf = input_pdf
+            # A scan has no text to tell a Banquet Check from; the OCR'd copy does.
+            self.file_prefix = "BC_" if is_banquet_check_document(self.doc) else "BEO_"
+            self._written.clear()
+        if results is not None:
+            self._pages = {}
+            for r in results:
+                bucket = page_bucket(r)
+                if bucket not in PROBLEM_BUCKETS:
+                    self._pages.setdefault(bucket, []).append(r.page_number - 1)
+        for beo, indexes in self._pages.items():
+            self._write(beo, indexes)
+        self._current = None
+        self.doc.close()
 
 
 def split_pdf(
-    input_pdf: str,
+    input_pdf: PdfSource,
     outdir: str,
     stop_on_problems: bool = False,
     summary_page_count: int = 3,
+    page_results: Optional[List[PageResult]] = None,
+    workers: int = 1,
+    parallel_min_pages: int = 200,
+    use_select: bool = False,
+    ocr: Optional["OcrOptions"] = None,
+    analysis: Optional[SplitAnalysis] = None,
+    zip_path: Optional[Union[str, IO[bytes]]] = None,
+    on_beo: Optional[Callable[[str, str], None]] = None,
+    extended_report: bool = False,
+    max_open_writers: Optional[int] = None,
 ) -> Tuple[int, int, str]:
     """
     Split a PDF into individual BEO files.
+    input_pdf is a path or the PDF's bytes (read straight from memory, never copied to disk).
     First summary_page_count pages are treated as summary (no BEO); they go to UNKNOWN.
+    If page_results is given, it is extended with the per-page results (including timings).
+    With workers > 1, documents of at least parallel_min_pages pages are classified
+    across a process pool; the output is identical to serial mode.
+    Pages are copied one contiguous run at a time; use_select builds BEOs that
+    are split across several runs with select() on a copy of the input instead.
+    With ocr set, UNKNOWN pages are OCR'd with tesseract and re-classified
+    (output pages are still copied from the input unchanged).
+    With analysis (from analyze_pdf on the same file), pages are not classified again.
+    With zip_path (a path or a writable binary file such as io.BytesIO), per-BEO
+    PDFs are serialized in memory and added to that zip as STORED entries (their
+    streams are already Flate-compressed) instead of being kept in outdir, followed
+    by a deflated split_report.csv. Problem buckets are still saved to outdir.
+    Incremental mode: with on_beo, each BEO is also written to outdir/incremental as soon
+    as its pages are complete and on_beo(filename, path) is called, while the scan
+    continues (see IncrementalBeoWriter).
+    With extended_report, split_report.csv gets the per-page profiling columns and
+    split_report_summary.csv (per-rule aggregate) is written next to it (and zipped).
+    Bounded mode: with max_open_writers, each output is saved and closed as soon as
+    its last page is copied and at most that many stay open at once (see
+    write_bucket_runs_bounded), instead of holding every output until the end;
+    use_select is ignored. Outputs then appear in the zip in order of completion.
     Returns: (num_beos, num_problem_pages, report_path)
     """
     os.makedirs(outdir, exist_ok=True)
 
-    doc = fitz.open(input_pdf)
-    writers: Dict[str, fitz.Document] = {}
-    unknown_doc = fitz.open()
-    ambiguous_doc = fitz.open()
+    doc = open_pdf(input_pdf)
+
+    incremental = None
+    if on_beo is not None:
+        incremental = IncrementalBeoWriter(input_pdf, os.path.join(outdir, "incremental"), on_beo)
+    if analysis is None:
+        analysis = analyze_pdf(
+            input_pdf, summary_page_count, workers, parallel_min_pages,
+            on_page=incremental.add if incremental is not None else None,
+        )
 
-    results: List[PageResult] = []
-    problem_pages = 0
-    
-    # Detect if this is a Banquet Check document by checking first page
-    is_banquet_check = False
-    if doc.page_count > 0:
-        first_page = doc.load_page(0)
-        is_banquet_check = _is_banquet_check(first_page)
-    
     # Determine filename prefix
-    file_prefix = "BC_" if is_banquet_check else "BEO_"
+    file_prefix = "BC_" if analysis.is_banquet_check else "BEO_"
 
-    for idx in range(doc.page_count):
-        page_number = idx + 1
-        page = doc.load_page(idx)
+    results = list(analysis.results)
+    if ocr is not None:
+        from app.core.ocr import ocr_unknown_pages
+        results, _ = ocr_unknown_pages(input_pdf, results, ocr)
+    problem_pages = sum(1 for r in results if page_bucket(r) in PROBLEM_BUCKETS)
 
-        # First N pages are summary of event orders; do not assign to a BEO.
-        if summary_page_count > 0 and page_number <= summary_page_count:
-            problem_pages += 1
-            unknown_doc.insert_pdf(doc, from_page=idx, to_page=idx)
-            results.append(PageResult(page_number, "UNKNOWN", "", "(summary)"))
-            continue
+    if page_results is not None:
+        page_results.extend(results)
+    if incremental is not None:
+        incremental.finish(results)
 
-        beo, status, matches = extract_single_beo_from_page(page)
-
-        if status == "OK" and beo:
-            if beo not in writers:
-                writers[beo] = fitz.open()
-            # Insert this page into the target doc (page range is inclusive).
-            writers[beo].insert_pdf(doc, from_page=idx, to_page=idx)
-            results.append(PageResult(page_number, "OK", beo, ",".join(sorted(matches))))
-        elif status == "UNKNOWN":
-            problem_pages += 1
-            unknown_doc.insert_pdf(doc, from_page=idx, to_page=idx)
-            results.append(PageResult(page_number, "UNKNOWN", "", ""))
-        else:  # AMBIGUOUS
-            problem_pages += 1
-            ambiguous_doc.insert_pdf(doc, from_page=idx, to_page=idx)
-            results.append(PageResult(page_number, "AMBIGUOUS", "", ",".join(sorted(matches))))
-
-    report_path = write_report_csv(outdir, results)
+    report_path = write_report_csv(outdir, results, extended=extended_report)
+    summary_path = write_report_summary_csv(outdir, results) if extended_report else None
 
+    runs = plan_page_runs(results)
     if stop_on_problems and problem_pages > 0:
         # Write the problem PDFs for review, but do not write per-BEO outputs.
-        if unknown_doc.page_count:
-            unknown_doc.save(os.path.join(outdir, "UNKNOWN_BEO.pdf"))
-        if ambiguous_doc.page_count:
-            ambiguous_doc.save(os.path.join(outdir, "AMBIGUOUS_BEO.pdf"))
-        # Close docs
-        for w in writers.values():
-            w.close()
-        unknown_doc.close()
-        ambiguous_doc.close()
-        doc.close()
-        return 0, problem_pages, report_path
+        runs = [run for run in runs if run[0] in PROBLEM_BUCKETS]
+    num_beos = len({bucket for bucket, _, _ in runs if bucket not in PROBLEM_BUCKETS})
+    bounded = bool(max_open_writers)
+    garbage = SELECT_SAVE_GARBAGE if use_select and not bounded else 0
 
-    # Save per-BEO PDFs with appropriate prefix
-    for beo, outdoc in writers.items():
-        out_path = os.path.join(outdir, f"{file_prefix}{beo}.pdf")
-        outdoc.save(out_path)
-        outdoc.close()
+    zipf = zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) if zip_path is not None else None
 
-    # Save problem buckets if present
-    if unknown_doc.page_count:
-        unknown_doc.save(os.path.join(outdir, "UNKNOWN_BEO.pdf"))
-    if ambiguous_doc.page_count:
-        ambiguous_doc.save(os.path.join(outdir, "AMBIGUOUS_BEO.pdf"))
+    def save_output(bucket: str, outdoc: "fitz.Document"):
+        if bucket in PROBLEM_BUCKETS:
+            # Problem buckets always go to outdir for review
+            outdoc.save(os.path.join(outdir, f"{bucket}_BEO.pdf"), garbage=garbage)
+            return
+        name = f"{file_prefix}{bucket}.pdf"
+        if zipf is not None:
+            zipf.writestr(name, pdf_bytes(outdoc, garbage=garbage))
+        else:
+            outdoc.save(os.path.join(outdir, name), garbage=garbage)
+
+    try:
+        if bounded:
+            write_bucket_runs_bounded(
+                doc, runs, save_output, max_open_writers, os.path.join(outdir, ".spill")
+            )
+        else:
+            outputs = build_bucket_docs(doc, runs, input_pdf=input_pdf if use_select else None)
+            # Save per-BEO PDFs with appropriate prefix, then the problem buckets
+            for bucket in sorted(outputs, key=lambda b: b in PROBLEM_BUCKETS):
+                save_output(bucket, outputs[bucket])
+                outputs[bucket].close()
+        if zipf is not None:
+            zipf.write(report_path, "split_report.csv", compress_type=zipfile.ZIP_DEFLATED)
+            if summary_path:
+                zipf.write(summary_path, "split_report_summary.csv", compress_type=zipfile.ZIP_DEFLATED)
+    finally:
+        if zipf is not None:
+            zipf.close()
 
-    unknown_doc.close()
-    ambiguous_doc.close()
     doc.close()
 
-    return len(writers), problem_pages, report_path
+    if stop_on_problems and problem_pages > 0:
+        return 0, problem_pages, report_path
+    return num_beos, problem_pages, report_path
 
 
 def run_ocr_if_needed(input_pdf: str, outdir: str) -> Optional[str]:
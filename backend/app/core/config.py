@@ -23,10 +23,62 @@ class Settings(BaseSettings):
     # Storage Configuration
     storage_bucket_name: str = "beo-outputs"
     download_url_expiry_days: int = 30
+    storage_per_beo_objects: bool = True  # Also store each BEO PDF as submissions/{id}/beos/<file>
+    storage_resumable_min_mb: Optional[int] = 50  # Larger files use chunked TUS uploads; None = never
+    storage_upload_parallel_parts: int = 4  # Concurrent parts, if the server supports TUS concatenation
+    storage_upload_max_retries: int = 5  # Retries per chunk, with exponential backoff
+    storage_upload_concurrency: int = 8  # Per-BEO object uploads in flight per submission
     
     # Processing Configuration
     max_file_size_mb: Optional[int] = None  # None = no limit (set empty string in env for no limit)
+    in_memory_max_mb: int = 32  # Smaller PDFs are split from memory with no temp files; larger spill to disk. 0 = always disk
     rate_limit_per_hour: int = 5
+    summary_page_count: int = 3  # Leading packet pages treated as summary (no BEO)
+    split_workers: int = 1  # Processes used to classify pages; 1 = serial
+    split_parallel_min_pages: int = 200  # Smaller packets are always classified serially
+    split_report_extended: bool = False  # Per-page rule/timing columns + split_report_summary.csv in the zip
+    split_max_open_writers: int = 32  # Output PDFs held in memory while splitting (LRU spills to disk); 0 = no cap
+    processing_workers: int = 2  # Submissions split/OCR'd/zipped at once (process pool)
+    processing_queue_depth: int = 10  # Submissions allowed to wait; beyond this uploads get 503
+    io_threads: int = 8  # Threads for blocking file I/O, queue and resumable-upload calls
+    progressive_results: bool = True  # Upload each BEO as soon as it is complete (needs per-BEO objects)
+    progress_update_seconds: float = 2.0  # Min interval between partial beo_count updates
+    progress_events: bool = True  # Stream page-level progress to /api/status/{id}/events
+    status_events_poll_seconds: float = 5.0  # Event stream's DB polling interval for jobs run elsewhere
+    
+    # Status Cache Configuration (in front of DatabaseService.get_submission)
+    status_cache_max_entries: int = 10000  # 0 disables the cache
+    status_cache_ttl_seconds: float = 5.0  # Pending/processing rows; bounds staleness across processes
+    status_cache_terminal_ttl_seconds: float = 86400.0  # Completed/failed rows
+    
+    # HTTP Connection Pool (shared by the async Supabase and Postmark clients)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20  # Idle connections kept open for reuse
+    http_keepalive_expiry_seconds: float = 30.0
+    http_timeout_seconds: float = 30.0  # Read/write/pool timeout
+    http_connect_timeout_seconds: float = 10.0
+    
+    # OCR Configuration
+    ocr_mode: str = "pages"  # "pages" = tesseract on UNKNOWN pages only; "document" = ocrmypdf whole file
+    ocr_workers: int = 2  # Processes OCR-ing pages in "pages" mode
+    ocr_dpi: int = 300
+    ocr_page_timeout_seconds: int = 60
+    ocr_regions_first: bool = True  # OCR header/footer crops first; full page only if still UNKNOWN
+    ocr_region_dpi: int = 150
+    ocr_cache_dir: Optional[str] = None  # None = system temp dir
+    
+    # Job Queue Configuration
+    job_queue_mode: str = "inline"  # "inline" = process in the API process; "queue" = python -m app.worker
+    job_queue_url: Optional[str] = None  # None = submissions table; "sqlite:///path" = local stand-in
+    job_lease_seconds: int = 300  # Lease length; renewed while a worker is processing
+    job_max_attempts: int = 3  # Claims per job before it is marked failed
+    job_poll_interval_seconds: float = 2.0  # Idle worker polling interval
+    worker_metrics_port: Optional[int] = None  # Workers serve Prometheus /metrics here; None = off
+    
+    # Result Cache Configuration (migrations/004_result_cache.sql)
+    result_cache_enabled: bool = False
+    result_cache_ttl_days: int = 7
+    result_cache_max_mb: int = 5120  # Total cached zip size before LRU eviction
     
     @property
     def max_file_size_bytes(self) -> Optional[int]:
@@ -35,6 +87,11 @@ class Settings(BaseSettings):
             return None
         return self.max_file_size_mb * 1024 * 1024
     
+    @property
+    def in_memory_max_bytes(self) -> int:
+        """Get the in-memory processing threshold in bytes."""
+        return self.in_memory_max_mb * 1024 * 1024
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
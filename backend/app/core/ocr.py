@@ -0,0 +1,247 @@
+"""Per-page OCR with tesseract for pages that have no usable text layer."""
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from app.core.beo_split import (
+    HEADER_FOOTER_MARGIN_RATIO,
+    UPPER_LEFT_HEIGHT_RATIO,
+    PageResult,
+    PdfSource,
+    classify_page_text,
+    open_pdf,
+    page_text_from_blocks,
+    source_pool,
+)
+
+
+@dataclass(frozen=True)
+class OcrOptions:
+    """Settings for per-page OCR."""
+    workers: int = 2  # processes rasterizing and OCR-ing pages
+    dpi: int = 300
+    page_timeout: float = 60.0  # seconds tesseract may spend on one page
+    cache_dir: Optional[str] = None  # None = <tmp>/beo_ocr_cache
+    cache_max_entries: int = 20000
+    only_textless: bool = False  # True = skip UNKNOWN pages that do have a text layer
+    language: str = "eng"
+    regions_first: bool = True  # OCR header/footer + upper-left crops before the full page
+    region_dpi: int = 150
+
+
+def tesseract_path() -> Optional[str]:
+    """Path of the tesseract binary, or None if it is not installed."""
+    return shutil.which("tesseract")
+
+
+def _cache_dir(options: OcrOptions) -> str:
+    path = options.cache_dir or os.path.join(tempfile.gettempdir(), "beo_ocr_cache")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _tsv_to_blocks(tsv: str, scale: float, x_off: float = 0.0, y_off: float = 0.0) -> List[tuple]:
+    """
+    Turn tesseract TSV output into PyMuPDF-style text blocks
+    (x0, y0, x1, y1, text, block_no, 0) in PDF points, offset by the crop origin.
+    """
+    # block_num -> {"bbox": [x0, y0, x1, y1], "lines": {(par, line): [words]}}
+    blocks: Dict[int, dict] = {}
+    for row in tsv.splitlines()[1:]:
+        cols = row.split("\t")
+        if len(cols) < 12 or cols[0] != "5":  # level 5 = word
+            continue
+        word = cols[11].strip()
+        if not word:
+            continue
+        block_num, par_num, line_num = int(cols[2]), int(cols[3]), int(cols[4])
+        left, top, width, height = (int(c) for c in cols[6:10])
+        b = blocks.setdefault(block_num, {"bbox": [left, top, left + width, top + height], "lines": {}})
+        bbox = b["bbox"]
+        bbox[0], bbox[1] = min(bbox[0], left), min(bbox[1], top)
+        bbox[2], bbox[3] = max(bbox[2], left + width), max(bbox[3], top + height)
+        b["lines"].setdefault((par_num, line_num), []).append(word)
+
+    result: List[tuple] = []
+    for block_no, (_, b) in enumerate(sorted(blocks.items())):
+        text = "".join(" ".join(words) + "\n" for _, words in sorted(b["lines"].items()))
+        x0, y0, x1, y1 = (v * scale for v in b["bbox"])
+        result.append((x0 + x_off, y0 + y_off, x1 + x_off, y1 + y_off, text, block_no, 0))
+    return result
+
+
+def _ocr_image(png: bytes, options: OcrOptions) -> Optional[str]:
+    """Run tesseract on one PNG; returns its TSV output, or None on failure/timeout."""
+    tesseract = tesseract_path()
+    if not tesseract:
+        return None
+    try:
+        result = subprocess.run(
+            [tesseract, "stdin", "stdout", "-l", options.language, "tsv"],
+            input=png,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=options.page_timeout,
+            check=True,
+        )
+    except (subprocess.TimeoutExpired, subprocess.CalledProcessError, OSError):
+        return None
+    return result.stdout.decode("utf-8", errors="replace")
+
+
+def _prune_cache(cache_dir: str, max_entries: int):
+    entries = [e for e in os.scandir(cache_dir) if e.name.endswith(".json")]
+    if len(entries) <= max_entries:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for e in entries[: len(entries) - max_entries]:
+        try:
+            os.remove(e.path)
+        except OSError:
+            pass
+
+
+def ocr_page_blocks(
+    page: "fitz.Page",
+    options: OcrOptions,
+    clip: Optional["fitz.Rect"] = None,
+    dpi: Optional[int] = None,
+) -> Optional[List[tuple]]:
+    """
+    Rasterize a page (or the clip region of it) and OCR it, using the page cache.
+    The cache key is a hash of the rendered pixels, so the same scanned page
+    in a later upload (or repeated within a packet) is only OCR'd once.
+    Blocks are returned in page coordinates.
+    """
+    dpi = dpi or options.dpi
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, clip=clip)
+    x_off, y_off = (clip.x0, clip.y0) if clip is not None else (0.0, 0.0)
+    scale = 72.0 / dpi
+
+    key = hashlib.sha256(pix.samples).hexdigest() + f"-{pix.width}x{pix.height}-{options.language}"
+    cache_path = os.path.join(_cache_dir(options), f"{key}.json")
+    tsv = None
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                tsv = json.load(f)
+        except (OSError, ValueError):
+            tsv = None
+
+    if tsv is None:
+        tsv = _ocr_image(pix.tobytes("png"), options)
+        if tsv is None:
+            return None
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(tsv, f)
+        os.replace(tmp_path, cache_path)
+    return _tsv_to_blocks(tsv, scale, x_off, y_off)
+
+
+def ocr_region_blocks(page: "fitz.Page", options: OcrOptions) -> Optional[List[tuple]]:
+    """
+    OCR only the regions the matcher looks at first: a top band tall enough to
+    hold both the header and the upper-left corner, and the footer band.
+    Rendered at options.region_dpi, which is plenty for printed BEO numbers.
+    """
+    rect = page.rect
+    top_ratio = max(HEADER_FOOTER_MARGIN_RATIO, UPPER_LEFT_HEIGHT_RATIO)
+    top = fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y0 + rect.height * top_ratio)
+    bottom = fitz.Rect(rect.x0, rect.y1 - rect.height * HEADER_FOOTER_MARGIN_RATIO, rect.x1, rect.y1)
+    blocks: List[tuple] = []
+    for clip in (top, bottom):
+        found = ocr_page_blocks(page, options, clip=clip, dpi=options.region_dpi)
+        if found is None:
+            return None
+        blocks.extend(found)
+    return blocks
+
+
+def _ocr_chunk(args: Tuple[Optional[PdfSource], List[int], OcrOptions]) -> List[Tuple[int, Optional[PageResult]]]:
+    """Process-pool worker: OCR a list of pages and classify their recognized text."""
+    input_pdf, indexes, options = args
+    doc = open_pdf(input_pdf)
+    out: List[Tuple[int, Optional[PageResult]]] = []
+    try:
+        for idx in indexes:
+            t0 = time.perf_counter()
+            page = doc.load_page(idx)
+            result = None
+            if options.regions_first:
+                # Fast path: the BEO number is almost always in the header/footer or corner.
+                blocks = ocr_region_blocks(page, options)
+                if blocks is not None:
+                    page_text = page_text_from_blocks(blocks, page.rect, time.perf_counter() - t0)
+                    result = classify_page_text(idx + 1, page_text, t0)
+                    if result.status == "UNKNOWN":
+                        result = None
+            if result is None:
+                blocks = ocr_page_blocks(page, options)
+                if blocks is not None:
+                    page_text = page_text_from_blocks(blocks, page.rect, time.perf_counter() - t0)
+                    result = classify_page_text(idx + 1, page_text, t0)
+            out.append((idx, result))
+    finally:
+        doc.close()
+    return out
+
+
+def pages_needing_ocr(results: List[PageResult], only_textless: bool = False) -> List[int]:
+    """0-based indexes of UNKNOWN pages (not summary pages) that OCR might resolve."""
+    return [
+        r.page_number - 1
+        for r in results
+        if r.status == "UNKNOWN"
+        and r.matches != "(summary)"
+        and (not only_textless or r.text_chars == 0)
+    ]
+
+
+def ocr_unknown_pages(
+    input_pdf: PdfSource,
+    results: List[PageResult],
+    options: Optional[OcrOptions] = None,
+) -> Tuple[List[PageResult], int]:
+    """
+    OCR only the pages that classified as UNKNOWN, across a process pool, and
+    re-classify them from the recognized text. Pages whose OCR fails or times
+    out keep their original result.
+    Returns: (results, pages_ocrd)
+    """
+    options = options or OcrOptions()
+    indexes = pages_needing_ocr(results, options.only_textless)
+    if not indexes or not tesseract_path():
+        return results, 0
+
+    workers = max(1, min(options.workers, len(indexes)))
+    n_chunks = min(len(indexes), workers * 4)
+    chunks = [indexes[i::n_chunks] for i in range(n_chunks)]
+
+    if workers == 1:
+        chunk_results = [_ocr_chunk((input_pdf, chunk, options)) for chunk in chunks if chunk]
+    else:
+        pool, task_input = source_pool(input_pdf, workers)
+        with pool:
+            chunk_results = list(pool.map(_ocr_chunk, [(task_input, chunk, options) for chunk in chunks if chunk]))
+
+    merged = list(results)
+    position = {r.page_number: i for i, r in enumerate(results)}
+    ocrd = 0
+    for chunk in chunk_results:
+        for idx, result in chunk:
+            if result is not None:
+                i = position[idx + 1]
+                # Keep whether the original page had a text layer; the text is now OCR'd
+                merged[i] = replace(result, ocr=True, text_layer=merged[i].text_layer)
+                ocrd += 1
+    _prune_cache(_cache_dir(options), options.cache_max_entries)
+    return merged, ocrd
@@ -0,0 +1,22 @@
+"""Process pools for the splitter, the API executor and the batch CLI."""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Tuple
+
+
+def spawn_pool(
+    max_workers: int,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple = (),
+) -> ProcessPoolExecutor:
+    """
+    A process pool whose workers are started with "spawn". Forking would copy
+    the parent's MuPDF state, server threads and open sockets into every worker.
+    Returns: ProcessPoolExecutor
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    )
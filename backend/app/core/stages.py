@@ -0,0 +1,182 @@
+"""CPU-bound processing stages (split, OCR, zip), run in a worker process."""
+import io
+import os
+import time
+from typing import Any, List, Optional, Set, Tuple, Union
+
+from app.core.beo_split import (
+    IncrementalBeoWriter,
+    PageResult,
+    PdfSource,
+    SplitAnalysis,
+    analyze_pdf,
+    open_pdf,
+    run_ocr_if_needed,
+    split_pdf,
+)
+from app.core.ocr import OcrOptions, tesseract_path
+from app.core.tracing import log, reset_trace_id, set_trace_id
+
+
+def choose_split_path(analysis: SplitAnalysis, per_page_ocr: Optional[OcrOptions]) -> str:
+    """
+    Pick how to produce outputs from an analysis:
+    digital:  split the original as-is
+    pages:    split the original, OCR-ing UNKNOWN pages one by one with tesseract
+    document: OCR the whole document with ocrmypdf first, then split that
+    """
+    if per_page_ocr is not None:
+        return "pages" if analysis.unknown_pages else "digital"
+    if analysis.recommended_path == "ocr" or analysis.beo_count == 0:
+        return "document"
+    return "digital"
+
+
+class PageProgress:
+    """
+    on_page callback that forwards results to an IncrementalBeoWriter (if any) and
+    puts ("pages", pages_done, pages_total, beos_found) on the progress queue at
+    most every interval seconds, plus once for the last page.
+    """
+
+    def __init__(self, progress: Any, pages_total: int, writer: Optional[IncrementalBeoWriter] = None,
+                 interval: float = 0.25):
+        self.progress = progress
+        self.pages_total = pages_total
+        self.writer = writer
+        self.interval = interval
+        self.pages_done = 0
+        self.beos: Set[str] = set()
+        self._last = 0.0
+
+    def __call__(self, result: PageResult):
+        if self.writer is not None:
+            self.writer.add(result)
+        self.pages_done += 1
+        if result.status == "OK" and result.beo:
+            self.beos.add(result.beo)
+        now = time.monotonic()
+        if now - self._last >= self.interval or self.pages_done == self.pages_total:
+            self._last = now
+            self.progress.put(("pages", self.pages_done, self.pages_total, len(self.beos)))
+
+
+def split_and_zip(
+    pdf_source: PdfSource,
+    temp_dir: str,
+    zip_name: str,
+    split_workers: int = 1,
+    parallel_min_pages: int = 200,
+    summary_page_count: int = 3,
+    ocr_options: Optional[OcrOptions] = None,
+    progress: Optional[Any] = None,
+    publish_beos: bool = True,
+    trace_id: Optional[str] = None,
+    extended_report: bool = False,
+    max_open_writers: Optional[int] = None,
+) -> Tuple[int, Union[str, bytes], dict]:
+    """
+    Split the PDF straight into a zip of the outputs plus split_report.csv.
+    pdf_source is a path, or the PDF's bytes for a pipeline without temp-file
+    round trips: the zip is then built and returned in memory too, and the PDF
+    only goes to disk if ocrmypdf has to OCR the whole document.
+    The PDF is analyzed first (classification only, nothing written) and the
+    digital, per-page OCR or whole-document OCR path is chosen before any
+    output is produced, so every path splits exactly once.
+    Per-page OCR needs ocr_options and tesseract; otherwise ocrmypdf is used
+    for documents without a usable text layer.
+    progress is a queue (e.g. a multiprocessing.Manager().Queue()) that receives
+    ("pages", pages_done, pages_total, beos_found) while pages are classified and,
+    with publish_beos, ("beo", filename, path) as each BEO is complete; then None
+    when the stage ends. The last "beo" event for a file is final.
+    extended_report adds per-page profiling to split_report.csv plus split_report_summary.csv.
+    max_open_writers caps the output PDFs held open while splitting (see split_pdf).
+    Only takes picklable arguments so it can be submitted to a process pool.
+    Returns: (num_beos, zip_path or zip bytes, stats) where stats has the chosen path, page
+    count, per-page classification seconds, the analyze/ocr/split_zip stage
+    seconds (ocr is None unless the whole document was OCR'd) and ocr_mode
+    ("pages", "document" or None)
+    """
+    output_dir = os.path.join(temp_dir, "output")
+    os.makedirs(output_dir, exist_ok=True)
+    per_page_ocr = ocr_options if ocr_options is not None and tesseract_path() else None
+
+    incremental = None
+    on_page = None
+    trace_token = set_trace_id(trace_id)
+    stats: dict = {"ocr_seconds": None, "ocr_mode": None}
+    try:
+        if progress is not None:
+            if publish_beos:
+                incremental = IncrementalBeoWriter(
+                    pdf_source,
+                    os.path.join(temp_dir, "incremental"),
+                    on_beo=lambda filename, path: progress.put(("beo", filename, path)),
+                )
+            with open_pdf(pdf_source) as doc:
+                pages_total = doc.page_count
+            on_page = PageProgress(progress, pages_total, incremental)
+
+        started = time.perf_counter()
+        analysis = analyze_pdf(
+            pdf_source,
+            summary_page_count=summary_page_count,
+            workers=split_workers,
+            parallel_min_pages=parallel_min_pages,
+            on_page=on_page,
+        )
+        stats["analyze_seconds"] = time.perf_counter() - started
+        path = choose_split_path(analysis, per_page_ocr)
+        stats["path"] = path
+        log(f"Split analysis: {analysis.coverage_report()} -> {path}")
+
+        input_pdf = pdf_source
+        if path == "document":
+            # Scanned PDF with no extractable text: OCR it, then classify the OCR'd file
+            started = time.perf_counter()
+            ocr_input = pdf_source
+            if not isinstance(ocr_input, str):
+                # ocrmypdf only reads files
+                ocr_input = os.path.join(temp_dir, "input.pdf")
+                with open(ocr_input, "wb") as f:
+                    f.write(pdf_source)
+            ocr_pdf = run_ocr_if_needed(ocr_input, temp_dir)
+            stats.update(ocr_seconds=time.perf_counter() - started, ocr_mode="document")
+            if ocr_pdf:
+                input_pdf = ocr_pdf
+                analysis = None
+        elif path == "pages":
+            stats["ocr_mode"] = "pages"
+
+        # Process the PDF; outputs are written straight into the zip
+        page_results: List[PageResult] = []
+        in_memory = not isinstance(pdf_source, str)
+        zip_path = os.path.join(temp_dir, zip_name)
+        zip_target = io.BytesIO() if in_memory else zip_path
+        started = time.perf_counter()
+        num_beos, problem_pages, report_path = split_pdf(
+            input_pdf=input_pdf,
+            outdir=output_dir,
+            stop_on_problems=False,  # Don't stop, just log problems
+            summary_page_count=summary_page_count,
+            workers=split_workers,
+            parallel_min_pages=parallel_min_pages,
+            ocr=per_page_ocr if path == "pages" else None,
+            analysis=analysis,
+            zip_path=zip_target,
+            page_results=page_results,
+            extended_report=extended_report,
+            max_open_writers=max_open_writers,
+        )
+        stats["split_zip_seconds"] = time.perf_counter() - started
+        if incremental is not None:
+            incremental.finish(page_results, input_pdf)
+        stats["pages"] = len(page_results)
+        stats["classify_seconds"] = [
+            r.classify_ms / 1000 for r in page_results if r.matches != "(summary)"
+        ]
+        return num_beos, zip_target.getvalue() if in_memory else zip_path, stats
+    finally:
+        reset_trace_id(trace_token)
+        if progress is not None:
+            progress.put(None)
@@ -0,0 +1,32 @@
+"""Per-submission trace IDs, carried through log lines."""
+import contextvars
+import uuid
+from typing import Optional
+
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_id", default=None)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def get_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id: Optional[str]) -> contextvars.Token:
+    """
+    Tag log lines from the current context (and asyncio tasks it starts) with trace_id.
+    Returns: token for reset_trace_id
+    """
+    return _trace_id.set(trace_id)
+
+
+def reset_trace_id(token: contextvars.Token):
+    _trace_id.reset(token)
+
+
+def log(message: str):
+    """print() with the current trace ID, so one submission's lines can be found across processes."""
+    trace_id = _trace_id.get()
+    print(f"[trace={trace_id}] {message}" if trace_id else message, flush=True)
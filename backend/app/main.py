@@ -1,11 +1,14 @@
 """FastAPI application entry point."""
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import os
 
 from app.core.config import settings
-from app.routes import upload, status
+from app.routes import upload, status, files
+from app.services.clients import close_clients
+from app.services.executor import processing_executor
 
 app = FastAPI(
     title="BEO Separator API",
@@ -25,6 +28,16 @@ def is_origin_allowed(origin: str) -> bool:
         return True
     return False
 
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse uploads whose Content-Length is over the size limit before the body is read."""
+    if request.method == "POST" and request.url.path == "/api/upload" and upload.declared_size_too_large(request):
+        error = upload.file_too_large()
+        return JSONResponse(status_code=error.status_code, content={"detail": error.detail})
+    return await call_next(request)
+
+
+# Added after the size check so its 413s carry CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origin_regex=r"https?://(localhost|127\.0\.0\.1)(:\d+)?|https://.*\.vercel\.app",
@@ -37,6 +50,7 @@ app.add_middleware(
 # Include routers
 app.include_router(upload.router, prefix="/api", tags=["upload"])
 app.include_router(status.router, prefix="/api", tags=["status"])
+app.include_router(files.router, prefix="/api", tags=["files"])
 
 
 @app.get("/")
@@ -51,6 +65,19 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage latencies, pages, BEOs, OCR, cache hits, queue depth."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    """Stop the processing worker pools and close the shared connection pool."""
+    processing_executor.shutdown()
+    await close_clients()
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler."""
@@ -1,6 +1,6 @@
 """Pydantic models for submission data."""
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
 
@@ -36,3 +36,16 @@ class UploadResponse(BaseModel):
     status: str
     status_url: str
     message: str
+
+
+class BeoFile(BaseModel):
+    """One individual BEO PDF of a submission."""
+    name: str
+    size: Optional[int] = None
+    download_url: str
+
+
+class BeoFileList(BaseModel):
+    """Response model for listing a submission's BEO files."""
+    submission_id: UUID
+    files: List[BeoFile]
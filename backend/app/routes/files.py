@@ -0,0 +1,140 @@
+"""Endpoints for a submission's individual BEO files."""
+import asyncio
+import zipfile
+from collections import deque
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+from app.models.submission import BeoFile, BeoFileList
+from app.services.pdf_processor import beo_folder
+from app.services.storage import storage_service
+from app.core.config import settings
+
+router = APIRouter()
+security = HTTPBearer(auto_error=False)
+
+# Files downloaded ahead of the one being streamed
+ZIP_PREFETCH = 4
+
+
+def verify_api_key(credentials: HTTPAuthorizationCredentials):
+    """Verify API key from Authorization header."""
+    if credentials.credentials != settings.api_secret_key:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    return True
+
+
+class _ZipSink:
+    """Write-only, unseekable file object that buffers zipfile output until drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_zip(names: List[str], folder: str):
+    """
+    Yield a zip of the named files in folder as it is built. Downloads run
+    concurrently on the shared pool, up to ZIP_PREFETCH files ahead of the one being written, and
+    entries are STORED since the PDFs are already compressed.
+    """
+    sink = _ZipSink()
+    pending = deque()
+    try:
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zipf:
+
+            async def write_next() -> bytes:
+                name, download = pending.popleft()
+                data = await download
+                if data is None:
+                    raise Exception(f"Failed to download {name}")
+                zipf.writestr(name, data)
+                return sink.drain()
+
+            for name in names:
+                pending.append((name, asyncio.ensure_future(
+                    storage_service.download_bytes(f"{folder}/{name}")
+                )))
+                if len(pending) > ZIP_PREFETCH:
+                    yield await write_next()
+            while pending:
+                yield await write_next()
+        # Central directory
+        yield sink.drain()
+    finally:
+        for _, download in pending:
+            download.cancel()
+
+
+async def _list_beo_files(submission_id: UUID) -> List[dict]:
+    entries = await storage_service.list_files(beo_folder(submission_id))
+    if not entries:
+        raise HTTPException(status_code=404, detail="No BEO files found for this submission")
+    return entries
+
+
+@router.get("/submissions/{submission_id}/beos", response_model=BeoFileList)
+async def list_beos(
+    submission_id: UUID,
+    authorization: Optional[HTTPAuthorizationCredentials] = Depends(security),
+):
+    """
+    List a submission's individual BEO PDFs with a signed download URL for each.
+    Requires API key in Authorization header.
+    """
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing Authorization header")
+    verify_api_key(authorization)
+
+    folder = beo_folder(submission_id)
+    entries = await _list_beo_files(submission_id)
+    urls = await storage_service.create_signed_urls([f"{folder}/{e['name']}" for e in entries])
+    files = [
+        BeoFile(name=e["name"], size=e["size"], download_url=urls[f"{folder}/{e['name']}"])
+        for e in entries
+        if f"{folder}/{e['name']}" in urls
+    ]
+    return BeoFileList(submission_id=submission_id, files=files)
+
+
+@router.get("/submissions/{submission_id}/beos.zip")
+async def download_beos_zip(
+    submission_id: UUID,
+    names: Optional[List[str]] = Query(None, description="File names to include; all if omitted"),
+    authorization: Optional[HTTPAuthorizationCredentials] = Depends(security),
+):
+    """
+    Stream a zip of the chosen BEO PDFs (?names=BEO_1001.pdf&names=BEO_1002.pdf),
+    built on the fly. Requires API key in Authorization header.
+    """
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing Authorization header")
+    verify_api_key(authorization)
+
+    available = [e["name"] for e in await _list_beo_files(submission_id)]
+    if names:
+        unknown = set(names) - set(available)
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Unknown files: {', '.join(sorted(unknown))}")
+        available = [name for name in available if name in set(names)]
+
+    return StreamingResponse(
+        stream_zip(available, beo_folder(submission_id)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="beos_{submission_id}.zip"'},
+    )
@@ -1,11 +1,15 @@
-"""Status endpoint for checking submission progress."""
-from fastapi import APIRouter, HTTPException
+"""Status endpoints for checking submission progress."""
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from uuid import UUID
 from typing import Optional
 
 from app.models.submission import SubmissionResponse
-from app.services.database import db_service
+from app.services.database import TERMINAL_STATUSES, db_service
+from app.services.progress import progress_hub
 from app.core.config import settings
 
 router = APIRouter()
@@ -34,9 +38,92 @@ async def get_status(
     verify_api_key(authorization)
     
     # Get submission from database
-    submission = db_service.get_submission(submission_id)
+    submission = await db_service.get_submission(submission_id)
     
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
     
     return SubmissionResponse(**submission)
+
+
+def _row_snapshot(submission: dict) -> dict:
+    """Progress snapshot built from a submissions row."""
+    return {
+        "submission_id": submission["id"],
+        "status": submission["status"],
+        "beo_count": submission.get("beo_count"),
+        "download_url": submission.get("download_url"),
+        "error_message": submission.get("error_message"),
+    }
+
+
+def _sse(snapshot: dict) -> str:
+    clean = {k: v for k, v in snapshot.items() if v is not None}
+    return f"event: status\ndata: {json.dumps(clean, default=str)}\n\n"
+
+
+async def status_event_stream(submission_id: UUID, request: Request):
+    """
+    Yield server-sent events for a submission until it completes or fails.
+    Snapshots come from the in-process progress hub while this process runs the
+    job; when it runs elsewhere (a queue worker), the database is polled every
+    status_events_poll_seconds instead. Idle periods send a keep-alive comment.
+    """
+    queue = progress_hub.subscribe(submission_id)
+    last = None
+    try:
+        while True:
+            # The first read doesn't wait when this process isn't tracking the submission
+            timeout = settings.status_events_poll_seconds
+            if last is None and progress_hub.snapshot(submission_id) is None:
+                timeout = 0
+            try:
+                snapshot = await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                snapshot = None
+            if await request.is_disconnected():
+                return
+
+            if snapshot is None and progress_hub.snapshot(submission_id) is None:
+                # Not tracked in this process: fall back to polling the database
+                submission = await db_service.get_submission(submission_id)
+                if not submission:
+                    yield 'event: error\ndata: {"detail": "Submission not found"}\n\n'
+                    return
+                snapshot = _row_snapshot(submission)
+
+            if snapshot is None or snapshot == last:
+                yield ": keep-alive\n\n"
+                continue
+            last = snapshot
+            yield _sse(snapshot)
+            if snapshot.get("status") in TERMINAL_STATUSES:
+                return
+    finally:
+        progress_hub.unsubscribe(submission_id, queue)
+
+
+@router.get("/status/{submission_id}/events")
+async def get_status_events(
+    submission_id: UUID,
+    request: Request,
+    api_key: Optional[str] = Query(None, description="API key, for clients (EventSource) that cannot set headers"),
+    authorization: Optional[HTTPAuthorizationCredentials] = Depends(security),
+):
+    """
+    Stream status changes and page-level progress (pages_done / pages_total,
+    beos_found) as server-sent events, ending once the submission completes or
+    fails. GET /status/{submission_id} remains available for polling.
+    Requires API key in Authorization header or the api_key query parameter.
+    """
+    key = authorization.credentials if authorization else api_key
+    if not key:
+        raise HTTPException(status_code=401, detail="Missing Authorization header")
+    if key != settings.api_secret_key:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    return StreamingResponse(
+        status_event_stream(submission_id, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
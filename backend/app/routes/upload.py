@@ -1,15 +1,21 @@
 """File upload endpoint."""
+import hashlib
 import os
+import shutil
 import tempfile
 from datetime import datetime, timedelta
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple, Union
 
 from app.models.submission import SubmissionCreate, UploadResponse
 from app.services.database import db_service
 from app.services.pdf_processor import process_pdf_async
+from app.services.executor import processing_executor
+from app.services.job_queue import get_job_queue
+from app.services.storage import storage_service
 from app.core.config import settings
+from app.core.tracing import log, new_trace_id, set_trace_id
 
 router = APIRouter()
 security = HTTPBearer(auto_error=False)
@@ -17,6 +23,11 @@ security = HTTPBearer(auto_error=False)
 # Simple in-memory rate limiting (for production, use Redis)
 _rate_limit_store: Dict[str, list] = {}
 
+# Uploads are copied to disk this many bytes at a time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Allowance for the multipart boundaries and form fields around the PDF in Content-Length
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
 
 def verify_api_key(credentials: HTTPAuthorizationCredentials):
     """Verify API key from Authorization header."""
@@ -47,6 +58,74 @@ def check_rate_limit(email: str) -> bool:
     return True
 
 
+def file_too_large() -> HTTPException:
+    """413 response for an upload over max_file_size_mb."""
+    return HTTPException(
+        status_code=413,
+        detail=f"File size exceeds maximum of {settings.max_file_size_mb}MB"
+    )
+
+
+def declared_size_too_large(request: Request) -> bool:
+    """Whether the Content-Length header alone puts the upload over max_file_size_mb."""
+    max_bytes = settings.max_file_size_bytes
+    try:
+        length = int(request.headers.get("content-length", ""))
+    except ValueError:
+        return False
+    return bool(max_bytes) and length > max_bytes + MULTIPART_OVERHEAD_BYTES
+
+
+async def stream_upload(
+    upload: UploadFile,
+    dest_path: str,
+    max_bytes: Optional[int] = None,
+    in_memory_max_bytes: int = 0,
+) -> Tuple[Union[bytes, str], int, str]:
+    """
+    Read an upload in UPLOAD_CHUNK_SIZE chunks, keeping it in memory while it
+    fits in in_memory_max_bytes and spilling it to dest_path once it does not.
+    Rejects the upload (413) as soon as the running size passes max_bytes, and
+    hashes the content while streaming. Disk writes run on the I/O thread pool.
+    Returns: (content bytes, or dest_path if spilled; file_size; sha256 hex digest)
+    """
+    digest = hashlib.sha256()
+    file_size = 0
+    buffer = bytearray()
+    f = None
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            file_size += len(chunk)
+            if max_bytes and file_size > max_bytes:
+                raise file_too_large()
+            digest.update(chunk)
+            if f is None and file_size > in_memory_max_bytes:
+                f = await processing_executor.run_io(open, dest_path, "wb")
+                await processing_executor.run_io(f.write, buffer)
+                buffer = bytearray()
+            if f is not None:
+                await processing_executor.run_io(f.write, chunk)
+            else:
+                buffer += chunk
+    finally:
+        if f is not None:
+            await processing_executor.run_io(f.close)
+    content = dest_path if f is not None else bytes(buffer)
+    return content, file_size, digest.hexdigest()
+
+
+async def process_inline(temp_dir: Optional[str], **kwargs):
+    """Run process_pdf_async on an upload, then remove the directory it was spilled to (if any)."""
+    try:
+        await process_pdf_async(**kwargs)
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
 @router.post("/upload", response_model=UploadResponse)
 async def upload_file(
     request: Request,
@@ -88,45 +167,77 @@ async def upload_file(
     if pdf_file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="File must be a PDF")
     
-    # Get file size
-    file_size = 0
+    # In inline mode, reserve a processing slot before accepting the file
+    inline = settings.job_queue_mode != "queue"
+    if inline and not processing_executor.try_reserve():
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy processing other submissions. Please try again shortly."
+        )
+    
+    temp_dir = None
     temp_file_path = None
+    # Follows the submission through the API, worker and process-pool logs
+    trace_id = new_trace_id()
+    set_trace_id(trace_id)
     
     try:
-        # Save uploaded file to temporary location
+        # Keep the upload in memory, or stream it to a temporary location if it is large
         temp_dir = tempfile.mkdtemp(prefix="beo_upload_")
         temp_file_path = os.path.join(temp_dir, pdf_file.filename)
-        
-        with open(temp_file_path, "wb") as f:
-            content = await pdf_file.read()
-            file_size = len(content)
-            f.write(content)
-        
-        # Validate file size if limit is set
-        if settings.max_file_size_bytes:
-            if file_size > settings.max_file_size_bytes:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"File size exceeds maximum of {settings.max_file_size_mb}MB"
-                )
+        content, file_size, content_sha256 = await stream_upload(
+            pdf_file, temp_file_path, settings.max_file_size_bytes, settings.in_memory_max_bytes
+        )
+        pdf_data = content if isinstance(content, bytes) else None
+        if pdf_data is not None:
+            temp_file_path = None
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            temp_dir = None
         
         # Create submission record
-        submission_id = db_service.create_submission(
+        submission_id = await db_service.create_submission(
             name=name,
             email=email,
             event_name=event_name,
             file_size=file_size,
         )
+        log(f"Accepted submission {submission_id} ({file_size} bytes, {'inline' if inline else 'queued'})")
         
-        # Queue background processing task
-        background_tasks.add_task(
-            process_pdf_async,
-            submission_id=submission_id,
-            pdf_file_path=temp_file_path,
-            name=name,
-            email=email,
-            event_name=event_name,
-        )
+        if inline:
+            # Queue background processing task (releases the reserved slot when done)
+            background_tasks.add_task(
+                processing_executor.run_reserved,
+                process_inline,
+                temp_dir,
+                submission_id=submission_id,
+                pdf_file_path=temp_file_path,
+                pdf_data=pdf_data,
+                name=name,
+                email=email,
+                event_name=event_name,
+                content_sha256=content_sha256,
+                trace_id=trace_id,
+            )
+        else:
+            # Hand the PDF to the worker pods through storage and the job queue
+            input_path = f"submissions/{submission_id}/input.pdf"
+            if not await storage_service.upload_content(content, input_path, content_type="application/pdf"):
+                raise Exception("Failed to upload file to storage")
+            await processing_executor.run_io(
+                get_job_queue().enqueue,
+                submission_id,
+                {
+                    "pdf_storage_path": input_path,
+                    "name": name,
+                    "email": email,
+                    "event_name": event_name,
+                    "content_sha256": content_sha256,
+                    "file_size": file_size,
+                    "trace_id": trace_id,
+                },
+            )
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
         
         return UploadResponse(
             submission_id=submission_id,
@@ -136,9 +247,16 @@ async def upload_file(
         )
         
     except HTTPException:
+        if inline:
+            processing_executor.release()
+        # Clean up partial upload (e.g. rejected for size)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
         raise
     except Exception as e:
+        if inline:
+            processing_executor.release()
         # Clean up temp file on error
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
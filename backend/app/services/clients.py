@@ -0,0 +1,70 @@
+"""
+Shared async HTTP connection pool and Supabase client, created on first use.
+httpx and supabase are imported there too, keeping them out of application startup.
+"""
+import asyncio
+from typing import TYPE_CHECKING, Optional
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+    from supabase import AsyncClient
+
+_http_client: Optional["httpx.AsyncClient"] = None
+_http_loop: Optional[asyncio.AbstractEventLoop] = None
+_supabase: Optional["AsyncClient"] = None
+_supabase_http: Optional["httpx.AsyncClient"] = None
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    """
+    The keep-alive httpx client shared by Supabase and Postmark calls.
+    Created on first use in the running event loop (and again if the loop changes,
+    since an httpx client cannot move between loops).
+    """
+    global _http_client, _http_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_loop is not loop:
+        import httpx
+        
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(settings.http_timeout_seconds, connect=settings.http_connect_timeout_seconds),
+        )
+        _http_loop = loop
+    return _http_client
+
+
+async def get_supabase() -> "AsyncClient":
+    """Async Supabase client (service key) on the shared connection pool."""
+    global _supabase, _supabase_http
+    http_client = get_http_client()
+    if _supabase is None or _supabase_http is not http_client:
+        from supabase import AsyncClientOptions, acreate_client
+        
+        _supabase = await acreate_client(
+            settings.supabase_url,
+            settings.supabase_service_key,
+            options=AsyncClientOptions(
+                httpx_client=http_client,
+                auto_refresh_token=False,
+                persist_session=False,
+            ),
+        )
+        _supabase_http = http_client
+    return _supabase
+
+
+async def close_clients():
+    """Close the shared pool (called on application shutdown)."""
+    global _http_client, _supabase, _supabase_http
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+    _supabase = None
+    _supabase_http = None
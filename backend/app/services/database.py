@@ -1,19 +1,89 @@
 """Supabase database client for submissions."""
-from supabase import create_client, Client
-from typing import Optional
+from collections import OrderedDict
+from typing import Optional, Tuple
 from uuid import UUID
 from datetime import datetime
+import threading
+import time
 
 from app.core.config import settings
+from app.services.clients import get_supabase
+from app.services.metrics import CACHE_LOOKUPS
+
+# Statuses a submission never leaves
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class SubmissionCache:
+    """
+    LRU cache of submission rows with a TTL. Rows that are completed or failed
+    no longer change, so they get the long terminal_ttl; in-flight rows get a
+    short ttl, which bounds staleness when another process (a queue worker)
+    updates them. Thread-safe, so it can be shared with worker threads.
+    """
+    
+    def __init__(self, max_entries: int, ttl: float, terminal_ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.terminal_ttl = terminal_ttl
+        self.hits = 0
+        self.misses = 0
+        self._rows: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _expires_at(self, row: dict) -> float:
+        ttl = self.terminal_ttl if row.get("status") in TERMINAL_STATUSES else self.ttl
+        return time.monotonic() + ttl
+    
+    def get(self, key: str) -> Optional[dict]:
+        """Cached row (a copy), or None if missing or expired."""
+        with self._lock:
+            entry = self._rows.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._rows[key]
+                self.misses += 1
+                return None
+            self._rows.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+    
+    def put(self, key: str, row: dict):
+        """Cache a complete row, evicting the least recently used beyond max_entries."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._rows[key] = (self._expires_at(row), dict(row))
+            self._rows.move_to_end(key)
+            while len(self._rows) > self.max_entries:
+                self._rows.popitem(last=False)
+    
+    def update(self, key: str, fields: dict):
+        """Apply a write to a cached row (no-op if the row is not cached)."""
+        with self._lock:
+            entry = self._rows.get(key)
+            if entry is None:
+                return
+            row = {**entry[1], **fields}
+            self._rows[key] = (self._expires_at(row), row)
+            self._rows.move_to_end(key)
+    
+    def invalidate(self, key: str):
+        with self._lock:
+            self._rows.pop(key, None)
 
 
 class DatabaseService:
-    """Service for interacting with Supabase database."""
+    """Service for interacting with Supabase database (async, on the shared connection pool)."""
     
     def __init__(self):
-        self.client: Client = create_client(settings.supabase_url, settings.supabase_service_key)
+        self.cache = SubmissionCache(
+            max_entries=settings.status_cache_max_entries,
+            ttl=settings.status_cache_ttl_seconds,
+            terminal_ttl=settings.status_cache_terminal_ttl_seconds,
+        )
     
-    def create_submission(
+    async def create_submission(
         self,
         name: str,
         email: str,
@@ -21,7 +91,8 @@ class DatabaseService:
         file_size: int,
     ) -> UUID:
         """Create a new submission record."""
-        result = self.client.table("submissions").insert({
+        client = await get_supabase()
+        result = await client.table("submissions").insert({
             "name": name,
             "email": email,
             "event_name": event_name,
@@ -29,9 +100,11 @@ class DatabaseService:
             "file_size": file_size,
         }).execute()
         
-        return UUID(result.data[0]["id"])
+        row = result.data[0]
+        self.cache.put(row["id"], row)
+        return UUID(row["id"])
     
-    def update_submission_status(
+    async def update_submission_status(
         self,
         submission_id: UUID,
         status: str,
@@ -50,16 +123,35 @@ class DatabaseService:
             update_data["error_message"] = error_message
         if beo_count is not None:
             update_data["beo_count"] = beo_count
-        if status in ["completed", "failed"]:
+        if status in TERMINAL_STATUSES:
             update_data["completed_at"] = datetime.utcnow().isoformat()
         
-        self.client.table("submissions").update(update_data).eq("id", str(submission_id)).execute()
+        try:
+            client = await get_supabase()
+            await client.table("submissions").update(update_data).eq("id", str(submission_id)).execute()
+        except Exception:
+            # The write may or may not have landed; re-read on the next get
+            self.cache.invalidate(str(submission_id))
+            raise
+        # Write-through so status reads see the change without a round trip
+        self.cache.update(str(submission_id), update_data)
     
-    def get_submission(self, submission_id: UUID) -> Optional[dict]:
-        """Get a submission by ID."""
-        result = self.client.table("submissions").select("*").eq("id", str(submission_id)).execute()
+    async def get_submission(self, submission_id: UUID, use_cache: bool = True) -> Optional[dict]:
+        """
+        Get a submission by ID (read-through SubmissionCache).
+        use_cache=False always reads the database, e.g. to see another worker's writes.
+        """
+        if use_cache:
+            cached = self.cache.get(str(submission_id))
+            CACHE_LOOKUPS.labels("status", "hit" if cached is not None else "miss").inc()
+            if cached is not None:
+                return cached
+        
+        client = await get_supabase()
+        result = await client.table("submissions").select("*").eq("id", str(submission_id)).execute()
         
         if result.data:
+            self.cache.put(str(submission_id), result.data[0])
             return result.data[0]
         return None
 
@@ -1,8 +1,9 @@
 """Postmark email service for sending download links."""
-import requests
 from typing import Optional
 
 from app.core.config import settings
+from app.core.tracing import log
+from app.services.clients import get_http_client
 
 
 class EmailService:
@@ -13,7 +14,7 @@ class EmailService:
         self.from_email = settings.postmark_from_email
         self.base_url = "https://api.postmarkapp.com"
     
-    def send_download_link(
+    async def send_download_link(
         self,
         to_email: str,
         to_name: str,
@@ -72,16 +73,16 @@ class EmailService:
         Note: This download link will expire in {settings.download_url_expiry_days} days.
         """
         
-        return self._send_email(to_email, subject, body_text, body_html)
+        return await self._send_email(to_email, subject, body_text, body_html)
     
-    def _send_email(
+    async def _send_email(
         self,
         to_email: str,
         subject: str,
         body_text: str,
         body_html: str,
     ) -> bool:
-        """Send email via Postmark API."""
+        """Send email via Postmark API on the shared keep-alive connection pool."""
         url = f"{self.base_url}/email"
         headers = {
             "Accept": "application/json",
@@ -98,11 +99,11 @@ class EmailService:
         }
         
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            response = await get_http_client().post(url, json=payload, headers=headers, timeout=10)
             response.raise_for_status()
             return True
         except Exception as e:
-            print(f"Error sending email via Postmark: {e}")
+            log(f"Error sending email via Postmark: {e}")
             return False
 
 
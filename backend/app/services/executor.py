@@ -0,0 +1,121 @@
+"""Bounded worker pools for submission processing."""
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.core.pools import spawn_pool
+
+
+class ProcessingExecutor:
+    """
+    Runs CPU-bound stages in a process pool and blocking network I/O in a
+    thread pool, so processing never blocks the event loop.
+    Admission is bounded: at most `workers` jobs run and `queue_depth` more wait;
+    try_reserve() returns False once that capacity is used up.
+    """
+    
+    def __init__(self, workers: int, queue_depth: int, io_threads: int):
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_depth)
+        self.io_threads = max(1, io_threads)
+        self._reserved = 0
+        self._cpu_pending = 0
+        self._lock = threading.Lock()
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        self._manager = None
+    
+    @property
+    def reserved(self) -> int:
+        """Jobs currently running or waiting."""
+        return self._reserved
+    
+    @property
+    def cpu_queue_depth(self) -> int:
+        """run_cpu calls waiting for a free worker process."""
+        return max(0, self._cpu_pending - self.workers)
+    
+    def try_reserve(self) -> bool:
+        """Claim a job slot; False if the queue is full."""
+        with self._lock:
+            if self._reserved >= self.capacity:
+                return False
+            self._reserved += 1
+            return True
+    
+    def release(self):
+        """Give back a slot claimed with try_reserve()."""
+        with self._lock:
+            self._reserved = max(0, self._reserved - 1)
+    
+    async def run_reserved(self, job: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run a job that holds a reserved slot, releasing the slot when it finishes."""
+        try:
+            return await job(*args, **kwargs)
+        finally:
+            self.release()
+    
+    def _get_cpu_pool(self) -> ProcessPoolExecutor:
+        if self._cpu_pool is None:
+            self._cpu_pool = spawn_pool(self.workers)
+        return self._cpu_pool
+    
+    def _get_io_pool(self) -> ThreadPoolExecutor:
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(
+                max_workers=self.io_threads,
+                thread_name_prefix="beo-io",
+            )
+        return self._io_pool
+    
+    async def run_cpu(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a picklable top-level function in the process pool."""
+        loop = asyncio.get_running_loop()
+        self._cpu_pending += 1
+        try:
+            return await loop.run_in_executor(self._get_cpu_pool(), functools.partial(fn, *args, **kwargs))
+        finally:
+            self._cpu_pending -= 1
+    
+    async def run_io(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking I/O call in the thread pool, in a copy of the caller's context (trace ID)."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._get_io_pool(), functools.partial(context.run, fn, *args, **kwargs)
+        )
+    
+    def progress_queue(self):
+        """
+        A queue that worker processes can put progress events on, for streaming
+        results out of a run_cpu stage while it is still running.
+        """
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+            return self._manager.Queue()
+    
+    def shutdown(self):
+        """Stop both pools and the progress queue manager (called on application shutdown)."""
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+            self._cpu_pool = None
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=False)
+            self._io_pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+# Singleton instance
+processing_executor = ProcessingExecutor(
+    workers=settings.processing_workers,
+    queue_depth=settings.processing_queue_depth,
+    io_threads=settings.io_threads,
+)
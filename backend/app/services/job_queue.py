@@ -0,0 +1,184 @@
+"""Durable job queue for submissions, claimed by workers with expiring leases."""
+import json
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class Job:
+    """A claimed submission."""
+    submission_id: UUID
+    payload: dict  # keyword arguments for process_pdf_async, plus where to find the PDF
+    attempts: int  # including the current one
+
+
+class SupabaseJobQueue:
+    """
+    Job queue backed by the `submissions` table (migrations/003_job_queue.sql).
+    Claiming goes through the `claim_submission` function, which uses
+    SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers never share a job.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def enqueue(self, submission_id: UUID, payload: dict):
+        """Make an existing pending submission claimable."""
+        self.client.table("submissions").update({
+            "job_payload": payload,
+        }).eq("id", str(submission_id)).execute()
+
+    def claim(self, worker_id: str, lease_seconds: int, max_attempts: int) -> Optional[Job]:
+        """Claim the oldest pending (or lease-expired) job, or None if there is none."""
+        result = self.client.rpc("claim_submission", {
+            "p_worker": worker_id,
+            "p_lease_seconds": lease_seconds,
+            "p_max_attempts": max_attempts,
+        }).execute()
+
+        if not result.data:
+            return None
+        row = result.data[0]
+        return Job(UUID(row["id"]), row["job_payload"] or {}, row["attempts"])
+
+    def renew(self, submission_id: UUID, worker_id: str, lease_seconds: int) -> bool:
+        """Extend a lease this worker still holds. False if the lease was lost."""
+        expires_at = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        result = self.client.table("submissions").update({
+            "lease_expires_at": expires_at.isoformat(),
+        }).eq("id", str(submission_id)).eq("lease_owner", worker_id).execute()
+        return bool(result.data)
+
+    def finish(self, submission_id: UUID, worker_id: str):
+        """Drop the lease once the pipeline has recorded completed/failed."""
+        self.client.table("submissions").update({
+            "lease_owner": None,
+            "lease_expires_at": None,
+        }).eq("id", str(submission_id)).eq("lease_owner", worker_id).execute()
+
+
+class SQLiteJobQueue:
+    """
+    Local stand-in for SupabaseJobQueue with the same claim/lease semantics,
+    for tests and single-machine development. BEGIN IMMEDIATE takes the write
+    lock before selecting, which plays the role of FOR UPDATE SKIP LOCKED.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires_at REAL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; transactions are opened explicitly where needed.
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def enqueue(self, submission_id: UUID, payload: dict):
+        """Add a pending job."""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, payload, created_at) VALUES (?, 'pending', ?, ?)",
+                (str(submission_id), json.dumps(payload), time.time()),
+            )
+
+    def claim(self, worker_id: str, lease_seconds: int, max_attempts: int) -> Optional[Job]:
+        """Claim the oldest pending (or lease-expired) job, or None if there is none."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE status = 'processing' AND lease_expires_at < ? AND attempts >= ?",
+                (now, max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id, payload, attempts FROM jobs "
+                "WHERE attempts < ? AND (status = 'pending' OR (status = 'processing' AND lease_expires_at < ?)) "
+                "ORDER BY created_at LIMIT 1",
+                (max_attempts, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            job_id, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = 'processing', lease_owner = ?, lease_expires_at = ?, attempts = ? "
+                "WHERE id = ?",
+                (worker_id, now + lease_seconds, attempts + 1, job_id),
+            )
+            conn.execute("COMMIT")
+            return Job(UUID(job_id), json.loads(payload), attempts + 1)
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def renew(self, submission_id: UUID, worker_id: str, lease_seconds: int) -> bool:
+        """Extend a lease this worker still holds. False if the lease was lost."""
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND lease_owner = ?",
+                (time.time() + lease_seconds, str(submission_id), worker_id),
+            )
+            return cur.rowcount > 0
+
+    def finish(self, submission_id: UUID, worker_id: str):
+        """Mark a job done so it is never claimed again."""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE id = ? AND lease_owner = ?",
+                (str(submission_id), worker_id),
+            )
+
+    def status(self, submission_id: UUID) -> Optional[str]:
+        """Queue status of a job (pending/processing/done/failed), or None if unknown."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (str(submission_id),)).fetchone()
+            return row[0] if row else None
+
+
+def create_job_queue(queue_url: Optional[str] = None):
+    """
+    Build the configured job queue.
+    "sqlite:///path/to/jobs.db" gives a SQLiteJobQueue; anything else uses Supabase.
+    """
+    if queue_url and queue_url.startswith("sqlite:///"):
+        return SQLiteJobQueue(queue_url[len("sqlite:///"):])
+
+    # Claims run on worker threads, so this queue keeps its own synchronous client.
+    from supabase import create_client
+    return SupabaseJobQueue(create_client(settings.supabase_url, settings.supabase_service_key))
+
+
+_job_queue = None
+
+
+def get_job_queue():
+    """The configured job queue, built on first use (not at import)."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = create_job_queue(settings.job_queue_url)
+    return _job_queue
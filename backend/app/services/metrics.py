@@ -0,0 +1,61 @@
+"""Prometheus metrics for the processing pipeline (served at /metrics)."""
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.services.executor import processing_executor
+
+STAGE_SECONDS = Histogram(
+    "beo_stage_seconds",
+    "Wall time of each processing stage",
+    ["stage"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+PAGE_CLASSIFY_SECONDS = Histogram(
+    "beo_page_classify_seconds",
+    "Text extraction + BEO matching time per page",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+PAGES_PROCESSED = Counter("beo_pages_processed", "Pages split")
+BEOS_PER_SUBMISSION = Histogram(
+    "beo_beos_per_submission",
+    "BEO files produced per completed submission",
+    buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+OCR_INVOCATIONS = Counter(
+    "beo_ocr_invocations",
+    "OCR runs: mode=pages (tesseract on UNKNOWN pages) or document (ocrmypdf)",
+    ["mode"],
+)
+CACHE_LOOKUPS = Counter(
+    "beo_cache_lookups",
+    "Cache lookups: cache=result (duplicate uploads) or status (submission rows)",
+    ["cache", "result"],
+)
+SUBMISSIONS = Counter("beo_submissions", "Submissions finished", ["status"])
+JOBS_IN_FLIGHT = Gauge("beo_jobs_in_flight", "Submissions being processed in this process")
+QUEUE_DEPTH = Gauge("beo_processing_queue_depth", "Split/OCR/zip stages waiting for a worker process")
+QUEUE_DEPTH.set_function(lambda: processing_executor.cpu_queue_depth)
+
+
+@contextmanager
+def timed(stage: str):
+    """Observe the wrapped block's wall time under beo_stage_seconds{stage=...}."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+
+
+def observe_split(stats: dict):
+    """Record the stats returned by stages.split_and_zip (timed in the worker process)."""
+    for stage in ("analyze", "ocr", "split_zip"):
+        if stats.get(f"{stage}_seconds") is not None:
+            STAGE_SECONDS.labels(stage).observe(stats[f"{stage}_seconds"])
+    for seconds in stats.get("classify_seconds", ()):
+        PAGE_CLASSIFY_SECONDS.observe(seconds)
+    PAGES_PROCESSED.inc(stats.get("pages", 0))
+    if stats.get("ocr_mode"):
+        OCR_INVOCATIONS.labels(stats["ocr_mode"]).inc()
@@ -1,124 +1,342 @@
 """PDF processing service for splitting BEOs."""
+import asyncio
+import io
 import os
-import zipfile
+import queue
 import tempfile
 import shutil
-from typing import Tuple
+import time
+import zipfile
+from typing import TYPE_CHECKING, Any, Optional, Set, Tuple, Union
 from uuid import UUID
 
-from app.core.beo_split import split_pdf
+from app.core.tracing import log, new_trace_id, reset_trace_id, set_trace_id
 from app.services.database import db_service
+from app.services.executor import processing_executor
+from app.services.metrics import (
+    BEOS_PER_SUBMISSION,
+    CACHE_LOOKUPS,
+    JOBS_IN_FLIGHT,
+    STAGE_SECONDS,
+    SUBMISSIONS,
+    observe_split,
+    timed,
+)
+from app.services.progress import progress_hub
+from app.services.result_cache import result_cache, result_cache_key
 from app.services.storage import storage_service
 from app.services.email import email_service
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from app.core.ocr import OcrOptions
+
+
+def ocr_options_from_settings() -> Optional["OcrOptions"]:
+    """Per-page OCR options, or None when whole-document OCR is configured."""
+    if settings.ocr_mode != "pages":
+        return None
+    from app.core.ocr import OcrOptions
+    return OcrOptions(
+        workers=settings.ocr_workers,
+        dpi=settings.ocr_dpi,
+        page_timeout=settings.ocr_page_timeout_seconds,
+        cache_dir=settings.ocr_cache_dir,
+        regions_first=settings.ocr_regions_first,
+        region_dpi=settings.ocr_region_dpi,
+    )
+
+
+def result_cache_options() -> dict:
+    """Settings that change a submission's output, as result_cache_key options."""
+    options = {
+        "summary_page_count": settings.summary_page_count,
+        "ocr_mode": settings.ocr_mode,
+        "ocr_dpi": settings.ocr_dpi,
+        "ocr_regions_first": settings.ocr_regions_first,
+        "ocr_region_dpi": settings.ocr_region_dpi,
+    }
+    if settings.split_report_extended:
+        options["extended_report"] = True
+    return options
+
+
+def beo_folder(submission_id: UUID) -> str:
+    """Storage folder holding a submission's individual BEO PDFs."""
+    return f"submissions/{submission_id}/beos"
+
+
+def _open_zip(zip_content: Union[str, bytes]) -> zipfile.ZipFile:
+    """Open a result zip given as a path or as bytes (from an in-memory run)."""
+    return zipfile.ZipFile(zip_content if isinstance(zip_content, str) else io.BytesIO(zip_content))
+
+
+def _read_zip_entry(zip_content: Union[str, bytes], name: str) -> bytes:
+    # STORED entries, so this is a plain read
+    with _open_zip(zip_content) as zipf:
+        return zipf.read(name)
+
+
+def _read_file(file_path: str) -> bytes:
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+def _upload_slots() -> asyncio.Semaphore:
+    """Bounds one submission's concurrent BEO uploads (and the entries held in memory for them)."""
+    return asyncio.Semaphore(max(1, settings.storage_upload_concurrency))
+
+
+async def _upload_zip_entry(
+    slots: asyncio.Semaphore, zip_content: Union[str, bytes], name: str, storage_path: str
+) -> bool:
+    # The entry is only read once a slot is free
+    async with slots:
+        data = await processing_executor.run_io(_read_zip_entry, zip_content, name)
+        # Upsert: a retried job uploads the same objects again.
+        return await storage_service.upload_bytes(data, storage_path, "application/pdf", upsert=True)
+
+
+async def _upload_pdf_file(slots: asyncio.Semaphore, file_path: str, storage_path: str) -> bool:
+    async with slots:
+        data = await processing_executor.run_io(_read_file, file_path)
+        return await storage_service.upload_bytes(data, storage_path, "application/pdf", upsert=True)
+
+
+async def upload_beo_objects(
+    submission_id: UUID,
+    zip_content: Union[str, bytes],
+    skip: Optional[Set[str]] = None,
+) -> int:
+    """
+    Upload every BEO PDF in the result zip (path or bytes) as its own object, in
+    parallel on the shared pool, at most storage_upload_concurrency at a time.
+    Files named in skip (already published progressively) are left alone.
+    Returns: number of files uploaded
+    """
+    with _open_zip(zip_content) as zipf:
+        names = [name for name in zipf.namelist() if name.endswith(".pdf") and name not in (skip or ())]
+    folder = beo_folder(submission_id)
+    slots = _upload_slots()
+    uploaded = await asyncio.gather(*(
+        _upload_zip_entry(slots, zip_content, name, f"{folder}/{name}")
+        for name in names
+    ))
+    if not all(uploaded):
+        raise Exception("Failed to upload BEO files to storage")
+    return len(names)
+
+
+async def set_status(submission_id: UUID, status: str, **fields):
+    """Record a status change in the database and push it to live subscribers."""
+    await db_service.update_submission_status(submission_id, status, **fields)
+    progress_hub.publish(submission_id, status=status, **fields)
+
+
+async def publish_progress(submission_id: UUID, progress: Any, stage: "asyncio.Future") -> Set[str]:
+    """
+    Relay a split_and_zip stage's progress events: page counts go to live
+    subscribers only, BEOs are uploaded as they are completed, and the
+    submission's beo_count is kept current in the database while processing.
+    Runs until the stage sends None (or finishes without doing so).
+    Returns: names of the files whose final version was uploaded
+    """
+    folder = beo_folder(submission_id)
+    slots = _upload_slots()
+    uploads = {}  # filename -> task uploading its latest version
+    last_update = 0.0
+    while True:
+        try:
+            event = await processing_executor.run_io(progress.get, True, 0.5)
+        except queue.Empty:
+            if stage.done():
+                break
+            continue
+        if event is None:
+            break
+        kind, *payload = event
+        if kind == "pages":
+            pages_done, pages_total, beos_found = payload
+            progress_hub.publish(
+                submission_id, pages_done=pages_done, pages_total=pages_total, beos_found=beos_found
+            )
+            continue
+        filename, path = payload
+        previous = uploads.get(filename)
+        if previous is not None:
+            await previous  # keep a rewritten file's uploads in order
+        uploads[filename] = asyncio.ensure_future(
+            _upload_pdf_file(slots, path, f"{folder}/{filename}")
+        )
+        if time.monotonic() - last_update >= settings.progress_update_seconds:
+            last_update = time.monotonic()
+            await set_status(submission_id, "processing", beo_count=len(uploads))
+
+    done = await asyncio.gather(*uploads.values(), return_exceptions=True)
+    return {name for name, ok in zip(uploads, done) if ok is True}
+
+
+async def _completed_elsewhere(submission_id: UUID) -> bool:
+    """True if the submission's row is already completed (by another run)."""
+    try:
+        row = await db_service.get_submission(submission_id, use_cache=False)
+    except Exception:
+        return False
+    return bool(row) and row.get("status") == "completed"
+
 
 async def process_pdf_async(
     submission_id: UUID,
-    pdf_file_path: str,
+    pdf_file_path: Optional[str],
     name: str,
     email: str,
     event_name: str = None,
+    content_sha256: Optional[str] = None,
+    trace_id: Optional[str] = None,
+    pdf_data: Optional[bytes] = None,
 ) -> Tuple[bool, str]:
     """
     Process a PDF file asynchronously.
+    With pdf_data (uploads under in_memory_max_mb), the PDF is processed from
+    memory and the result zip is kept in memory too; pdf_file_path is then None.
+    content_sha256 is the SHA-256 of the uploaded PDF, computed while it was streamed in.
+    trace_id (from the upload, or a new one) prefixes every log line of this run.
     Returns: (success, error_message)
     """
     temp_dir = None
+    trace_id = trace_id or new_trace_id()
+    trace_token = set_trace_id(trace_id)
+    JOBS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    log(f"Processing submission {submission_id}")
     try:
         # Update status to processing
-        db_service.update_submission_status(submission_id, "processing")
+        with timed("status_update"):
+            await set_status(submission_id, "processing")
         
-        # Create temporary directory for processing
-        temp_dir = tempfile.mkdtemp(prefix="beo_process_")
-        output_dir = os.path.join(temp_dir, "output")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Process the PDF
-        num_beos, problem_pages, report_path = split_pdf(
-            input_pdf=pdf_file_path,
-            outdir=output_dir,
-            stop_on_problems=False,  # Don't stop, just log problems
-        )
+        storage_path = f"submissions/{submission_id}/beos.zip"
         
-        # If no BEOs were extracted, try OCR for scanned PDFs
-        # This handles cases where the PDF is scanned and has no extractable text
-        if num_beos == 0:
-            from app.core.beo_split import run_ocr_if_needed
-            ocr_pdf = run_ocr_if_needed(pdf_file_path, temp_dir)
-            if ocr_pdf:
-                # Retry with OCR'd PDF - use a fresh output directory to avoid conflicts
-                ocr_output_dir = os.path.join(temp_dir, "output_ocr")
-                os.makedirs(ocr_output_dir, exist_ok=True)
-                num_beos, problem_pages, report_path = split_pdf(
-                    input_pdf=ocr_pdf,
-                    outdir=ocr_output_dir,
-                    stop_on_problems=False,
-                )
-                # Move OCR'd results to main output directory
-                if os.path.exists(ocr_output_dir):
-                    for file in os.listdir(ocr_output_dir):
-                        src = os.path.join(ocr_output_dir, file)
-                        dst = os.path.join(output_dir, file)
-                        if os.path.isfile(src):
-                            shutil.move(src, dst)
+        # Reuse the result of an identical earlier upload if there is one
+        cache_key = None
+        cached = None
+        if settings.result_cache_enabled and content_sha256:
+            cache_key = result_cache_key(content_sha256, **result_cache_options())
+            with timed("cache_lookup"):
+                cached = await result_cache.lookup(cache_key)
+                # Upsert: a retried job may already have written this object
+                if cached and not await storage_service.copy_file(cached["storage_path"], storage_path, upsert=True):
+                    cached = None
+            CACHE_LOOKUPS.labels("result", "hit" if cached else "miss").inc()
         
-        # Create zip file
-        zip_path = os.path.join(temp_dir, f"beos_{submission_id}.zip")
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Add all BEO/BC PDFs (both prefixes)
-            for file in os.listdir(output_dir):
-                if file.endswith('.pdf') and (file.startswith('BEO_') or file.startswith('BC_')):
-                    file_path = os.path.join(output_dir, file)
-                    zipf.write(file_path, file)
+        zip_content: Union[str, bytes, None] = None
+        published: Set[str] = set()
+        if cached:
+            num_beos = cached["beo_count"]
+            if settings.storage_per_beo_objects:
+                # The cache only holds the zip; fetch it to lay out the individual files
+                if (cached.get("size_bytes") or 0) <= settings.in_memory_max_bytes:
+                    zip_content = await storage_service.download_bytes(cached["storage_path"])
+                else:
+                    temp_dir = tempfile.mkdtemp(prefix="beo_process_")
+                    zip_content = os.path.join(temp_dir, f"beos_{submission_id}.zip")
+                    if not await storage_service.download_file(cached["storage_path"], zip_content):
+                        zip_content = None
+                if zip_content is None:
+                    raise Exception("Failed to download cached result")
+        else:
+            # Create temporary directory for processing
+            temp_dir = tempfile.mkdtemp(prefix="beo_process_")
+            
+            # Imported here so PyMuPDF only loads once a PDF is actually processed
+            from app.core.stages import split_and_zip
+            
+            # Split (with OCR fallback) and zip in the process pool, publishing
+            # each BEO as soon as it is complete when progressive results are on
+            publish_beos = settings.progressive_results and settings.storage_per_beo_objects
+            progress = None
+            if publish_beos or settings.progress_events:
+                progress = processing_executor.progress_queue()
+            stage = asyncio.ensure_future(processing_executor.run_cpu(
+                split_and_zip,
+                pdf_data if pdf_data is not None else pdf_file_path,
+                temp_dir,
+                f"beos_{submission_id}.zip",
+                split_workers=settings.split_workers,
+                parallel_min_pages=settings.split_parallel_min_pages,
+                summary_page_count=settings.summary_page_count,
+                ocr_options=ocr_options_from_settings(),
+                progress=progress,
+                publish_beos=publish_beos,
+                trace_id=trace_id,
+                extended_report=settings.split_report_extended,
+                max_open_writers=settings.split_max_open_writers,
+            ))
+            # "split" is the whole worker-process stage, queueing included;
+            # its analyze/ocr/split_zip parts are timed in the worker
+            with timed("split"):
+                if progress is not None:
+                    published = await publish_progress(submission_id, progress, stage)
+                num_beos, zip_content, split_stats = await stage
+            observe_split(split_stats)
+            
+            # Upload zip to storage
+            with timed("upload"):
+                if not await storage_service.upload_content(zip_content, storage_path, upsert=True):
+                    raise Exception("Failed to upload file to storage")
             
-            # Add split_report.csv
-            if os.path.exists(report_path):
-                zipf.write(report_path, "split_report.csv")
+            # Cache results that found BEOs (a 0-BEO result may just be a failed OCR run)
+            if cache_key and num_beos > 0:
+                with timed("cache_store"):
+                    await result_cache.store(cache_key, zip_content, num_beos)
         
-        # Upload zip to storage
-        storage_path = f"submissions/{submission_id}/beos.zip"
-        if not storage_service.upload_file(zip_path, storage_path):
-            raise Exception("Failed to upload file to storage")
+        if settings.storage_per_beo_objects:
+            with timed("beo_upload"):
+                await upload_beo_objects(submission_id, zip_content, skip=published)
         
         # Generate signed URL
-        download_url = storage_service.create_signed_url(
-            storage_path,
-            expires_in_days=settings.download_url_expiry_days
-        )
+        with timed("signed_url"):
+            download_url = await storage_service.create_signed_url(
+                storage_path,
+                expires_in_days=settings.download_url_expiry_days
+            )
         
         if not download_url:
             raise Exception("Failed to generate download URL")
         
         # Update database with results
-        db_service.update_submission_status(
-            submission_id,
-            "completed",
-            download_url=download_url,
-            beo_count=num_beos,
-        )
+        with timed("db_update"):
+            await set_status(submission_id, "completed", download_url=download_url, beo_count=num_beos)
         
         # Send email
-        email_service.send_download_link(
-            to_email=email,
-            to_name=name,
-            event_name=event_name,
-            download_url=download_url,
-            beo_count=num_beos,
-        )
+        with timed("email"):
+            await email_service.send_download_link(
+                to_email=email,
+                to_name=name,
+                event_name=event_name,
+                download_url=download_url,
+                beo_count=num_beos,
+            )
         
+        SUBMISSIONS.labels("completed").inc()
+        BEOS_PER_SUBMISSION.observe(num_beos)
+        log(f"Completed submission {submission_id}: {num_beos} BEOs in {time.perf_counter() - started:.1f}s")
         return True, ""
         
     except Exception as e:
         error_msg = str(e)
-        db_service.update_submission_status(
-            submission_id,
-            "failed",
-            error_message=error_msg,
-        )
+        SUBMISSIONS.labels("failed").inc()
+        log(f"Submission {submission_id} failed: {error_msg}")
+        if await _completed_elsewhere(submission_id):
+            # A duplicate run (e.g. after a lost lease) must not undo a finished one
+            log(f"Submission {submission_id} was already completed; not marking it failed")
+            return False, error_msg
+        await set_status(submission_id, "failed", error_message=error_msg)
         return False, error_msg
         
     finally:
+        JOBS_IN_FLIGHT.dec()
+        STAGE_SECONDS.labels("total").observe(time.perf_counter() - started)
+        
         # Clean up temporary files
         if temp_dir and os.path.exists(temp_dir):
             shutil.rmtree(temp_dir, ignore_errors=True)
@@ -126,3 +344,4 @@ async def process_pdf_async(
         # Clean up uploaded PDF
         if pdf_file_path and os.path.exists(pdf_file_path):
             os.remove(pdf_file_path)
+        reset_trace_id(trace_token)
@@ -0,0 +1,67 @@
+"""In-process pub/sub of submission progress, for the push status endpoint."""
+import asyncio
+import time
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from app.services.database import TERMINAL_STATUSES
+
+
+class ProgressHub:
+    """
+    Latest progress snapshot per submission, pushed to subscriber queues on every
+    change. Snapshots are merged dicts (status, pages_done, pages_total, beo_count,
+    download_url, error_message), so a subscriber that falls behind only needs the
+    newest one. Finished submissions are kept for retain_seconds so late
+    subscribers still get the final state.
+    Only call from the event loop thread.
+    """
+
+    def __init__(self, retain_seconds: float = 300.0):
+        self.retain_seconds = retain_seconds
+        self._snapshots: Dict[UUID, dict] = {}
+        self._finished_at: Dict[UUID, float] = {}
+        self._subscribers: Dict[UUID, List[asyncio.Queue]] = {}
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.retain_seconds
+        for submission_id in [s for s, t in self._finished_at.items() if t < cutoff]:
+            self._finished_at.pop(submission_id, None)
+            self._snapshots.pop(submission_id, None)
+
+    def snapshot(self, submission_id: UUID) -> Optional[dict]:
+        """Latest snapshot, or None if this process is not (or no longer) tracking the submission."""
+        snapshot = self._snapshots.get(submission_id)
+        return dict(snapshot) if snapshot is not None else None
+
+    def publish(self, submission_id: UUID, **fields):
+        """Merge fields into the submission's snapshot and push it to its subscribers."""
+        self._prune()
+        snapshot = self._snapshots.setdefault(submission_id, {"submission_id": str(submission_id)})
+        snapshot.update({k: v for k, v in fields.items() if v is not None})
+        if snapshot.get("status") in TERMINAL_STATUSES:
+            self._finished_at[submission_id] = time.monotonic()
+        for queue in self._subscribers.get(submission_id, ()):
+            if queue.full():
+                queue.get_nowait()  # drop the stale snapshot
+            queue.put_nowait(dict(snapshot))
+
+    def subscribe(self, submission_id: UUID) -> asyncio.Queue:
+        """Queue receiving every new snapshot; starts with the current one if there is one."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        snapshot = self.snapshot(submission_id)
+        if snapshot is not None:
+            queue.put_nowait(snapshot)
+        self._subscribers.setdefault(submission_id, []).append(queue)
+        return queue
+
+    def unsubscribe(self, submission_id: UUID, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(submission_id, [])
+        if queue in subscribers:
+            subscribers.remove(queue)
+        if not subscribers:
+            self._subscribers.pop(submission_id, None)
+
+
+# Singleton instance
+progress_hub = ProgressHub()
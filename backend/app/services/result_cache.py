@@ -0,0 +1,139 @@
+"""Content-hash cache of processed results, so duplicate uploads skip reprocessing."""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Union
+
+from app.core.config import settings
+from app.core.tracing import log
+from app.services.clients import get_supabase
+from app.services.storage import storage_service
+
+
+def result_cache_key(content_sha256: str, **options) -> str:
+    """Cache key for an uploaded PDF: its hash plus the splitter version and split options."""
+    from app.core.beo_split import SPLITTER_VERSION
+    
+    material = json.dumps(
+        {"sha256": content_sha256, "splitter": SPLITTER_VERSION, "options": options},
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache of output zips in the `result_cache` table (migrations/004_result_cache.sql).
+    Cached zips live under cache/{key}.zip in the storage bucket and are copied to
+    each submission on a hit, so evicting an entry never breaks a link already sent.
+    Entries expire after ttl_days; past max_bytes the least recently hit are evicted.
+    Async, on the shared connection pool.
+    """
+
+    def __init__(self, ttl_days: int, max_bytes: int):
+        self.ttl = timedelta(days=ttl_days)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    async def lookup(self, key: str) -> Optional[dict]:
+        """Return the cache entry (storage_path, beo_count, ...) for key, or None on a miss."""
+        try:
+            client = await get_supabase()
+            result = await client.table("result_cache").select("*").eq("key", key).execute()
+            entry = result.data[0] if result.data else None
+            if entry and self._expired(entry):
+                await self.evict(key, entry["storage_path"])
+                entry = None
+            if entry:
+                await client.table("result_cache").update({
+                    "hits": entry.get("hits", 0) + 1,
+                    "last_hit_at": datetime.utcnow().isoformat(),
+                }).eq("key", key).execute()
+        except Exception as e:
+            log(f"Error reading result cache: {e}")
+            entry = None
+
+        self._count(entry is not None)
+        return entry
+
+    async def store(self, key: str, zip_content: Union[str, bytes], beo_count: int) -> bool:
+        """
+        Upload a result zip (path or bytes) into the cache and record it, then
+        enforce the size bound.
+        """
+        storage_path = f"cache/{key}.zip"
+        if not await storage_service.upload_content(zip_content, storage_path, upsert=True):
+            return False
+        try:
+            client = await get_supabase()
+            await client.table("result_cache").upsert({
+                "key": key,
+                "storage_path": storage_path,
+                "beo_count": beo_count,
+                "size_bytes": os.path.getsize(zip_content) if isinstance(zip_content, str) else len(zip_content),
+                "hits": 0,
+                "created_at": datetime.utcnow().isoformat(),
+                "last_hit_at": datetime.utcnow().isoformat(),
+            }).execute()
+            await self._enforce_size()
+            return True
+        except Exception as e:
+            log(f"Error writing result cache: {e}")
+            return False
+
+    async def evict(self, key: str, storage_path: str):
+        """Remove one entry and its cached zip."""
+        await storage_service.delete_file(storage_path)
+        client = await get_supabase()
+        await client.table("result_cache").delete().eq("key", key).execute()
+
+    def _expired(self, entry: dict) -> bool:
+        created_at = entry.get("created_at")
+        if not created_at:
+            return False
+        created = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - created > self.ttl
+
+    async def _enforce_size(self):
+        """Evict expired entries, then least recently hit ones until the cache fits in max_bytes."""
+        client = await get_supabase()
+        result = await client.table("result_cache").select(
+            "key, storage_path, size_bytes, created_at"
+        ).order("last_hit_at").execute()
+        entries = []
+        for e in result.data or []:
+            if self._expired(e):
+                await self.evict(e["key"], e["storage_path"])
+            else:
+                entries.append(e)
+        total = sum(e.get("size_bytes") or 0 for e in entries)
+        for e in entries:
+            if total <= self.max_bytes:
+                break
+            await self.evict(e["key"], e["storage_path"])
+            total -= e.get("size_bytes") or 0
+
+
+# Singleton instance
+result_cache = ResultCache(
+    ttl_days=settings.result_cache_ttl_days,
+    max_bytes=settings.result_cache_max_mb * 1024 * 1024,
+)
@@ -0,0 +1,222 @@
+"""Chunked, resumable uploads over the TUS protocol (Supabase Storage /upload/resumable)."""
+import base64
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+
+TUS_VERSION = "1.0.0"
+# Supabase Storage requires every chunk but the last to be exactly 6 MiB.
+DEFAULT_CHUNK_SIZE = 6 * 1024 * 1024
+
+
+class UploadError(Exception):
+    """An upload failed after all retries, or the server rejected it."""
+
+
+@dataclass(frozen=True)
+class UploadMetrics:
+    """What one upload cost."""
+    bytes_sent: int
+    seconds: float
+    chunks: int
+    retries: int
+    parts: int  # parallel partial uploads (1 = plain sequential upload)
+
+    @property
+    def throughput_mb_s(self) -> float:
+        return self.bytes_sent / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+
+def encode_metadata(metadata: Dict[str, str]) -> str:
+    """Upload-Metadata header value: comma-separated "key base64(value)" pairs."""
+    return ",".join(
+        f"{key} {base64.b64encode(str(value).encode('utf-8')).decode('ascii')}"
+        for key, value in metadata.items()
+    )
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response: requests.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class TusUploader:
+    """
+    Uploads a file in chunks with per-chunk retry and exponential backoff; after a
+    failed chunk the offset is re-read from the server (HEAD) and the upload resumes
+    from there instead of starting over.
+    If the server advertises the TUS concatenation extension, files larger than one
+    chunk are split into parallel_parts partial uploads sent concurrently and joined
+    with a final concatenation request. Supabase Storage does not, so uploads there
+    are sequential.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        parallel_parts: int = 4,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        timeout: float = 60.0,
+    ):
+        self.endpoint = endpoint
+        self.headers = {"Tus-Resumable": TUS_VERSION, **(headers or {})}
+        self.chunk_size = chunk_size
+        self.parallel_parts = max(1, parallel_parts)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._extensions: Optional[List[str]] = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._chunks = 0
+
+    def _session(self) -> requests.Session:
+        # One keep-alive session per thread; requests.Session is not thread-safe.
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _request(self, method: str, url: str, expected: Tuple[int, ...], **kwargs) -> requests.Response:
+        headers = {**self.headers, **kwargs.pop("headers", {})}
+        response = self._session().request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+        if response.status_code in expected:
+            return response
+        if response.status_code == 429 or response.status_code >= 500:
+            raise _RetryableStatus(response)
+        raise UploadError(f"{method} {url} failed: HTTP {response.status_code} {response.text[:200]}")
+
+    def _with_retry(self, action: Callable[[], object], on_retry: Optional[Callable[[], None]] = None):
+        """Run action, retrying network errors, 429 and 5xx with exponential backoff and jitter."""
+        attempt = 0
+        while True:
+            try:
+                return action()
+            except (requests.ConnectionError, requests.Timeout, _RetryableStatus) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise UploadError(f"Giving up after {self.max_retries} retries: {e}") from e
+                with self._lock:
+                    self._retries += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                if on_retry is not None:
+                    on_retry()
+
+    def extensions(self) -> List[str]:
+        """Extensions the server advertises in its OPTIONS response (cached)."""
+        if self._extensions is None:
+            try:
+                response = self._with_retry(lambda: self._request("OPTIONS", self.endpoint, (200, 204)))
+                value = response.headers.get("Tus-Extension", "")
+                self._extensions = [e.strip() for e in value.split(",") if e.strip()]
+            except UploadError:
+                self._extensions = []
+        return self._extensions
+
+    def _create(self, length: int, headers: Dict[str, str]) -> str:
+        response = self._with_retry(lambda: self._request(
+            "POST", self.endpoint, (201,), headers={"Upload-Length": str(length), **headers},
+        ))
+        location = response.headers.get("Location")
+        if not location:
+            raise UploadError("Server did not return an upload Location")
+        return urljoin(self.endpoint, location)
+
+    def _offset(self, url: str) -> int:
+        response = self._with_retry(lambda: self._request("HEAD", url, (200, 204)))
+        return int(response.headers["Upload-Offset"])
+
+    def _send_range(self, url: str, file_path: str, start: int, length: int):
+        """PATCH bytes [start, start + length) of the file to an upload, resuming after failures."""
+        offset = 0
+        with open(file_path, "rb") as f:
+            while offset < length:
+                f.seek(start + offset)
+                chunk = f.read(min(self.chunk_size, length - offset))
+
+                def patch():
+                    if not chunk:  # a resync found the range already complete
+                        return offset
+                    response = self._request(
+                        "PATCH", url, (204,), data=chunk,
+                        headers={
+                            "Upload-Offset": str(offset),
+                            "Content-Type": "application/offset+octet-stream",
+                        },
+                    )
+                    return int(response.headers.get("Upload-Offset", offset + len(chunk)))
+
+                def resync():
+                    # The chunk may have been partly or fully stored before the failure.
+                    nonlocal offset, chunk
+                    server_offset = self._offset(url)
+                    if server_offset != offset:
+                        offset = server_offset
+                        f.seek(start + offset)
+                        chunk = f.read(min(self.chunk_size, length - offset))
+
+                if not chunk:
+                    break
+                offset = self._with_retry(patch, on_retry=resync)
+                with self._lock:
+                    self._chunks += 1
+
+    def upload(self, file_path: str, metadata: Optional[Dict[str, str]] = None) -> UploadMetrics:
+        """Upload a file; raises UploadError if it cannot be completed. Returns: UploadMetrics"""
+        size = os.path.getsize(file_path)
+        encoded = {"Upload-Metadata": encode_metadata(metadata)} if metadata else {}
+        self._retries = 0
+        self._chunks = 0
+        t0 = time.perf_counter()
+
+        parts = min(self.parallel_parts, max(1, -(-size // self.chunk_size)))
+        if parts > 1 and "concatenation" in self.extensions():
+            # Part boundaries on chunk multiples so every chunk but the last stays full size.
+            chunks_per_part = -(-size // self.chunk_size) // parts or 1
+            bounds = []
+            start = 0
+            for i in range(parts):
+                end = size if i == parts - 1 else min(size, start + chunks_per_part * self.chunk_size)
+                bounds.append((start, end - start))
+                start = end
+            bounds = [b for b in bounds if b[1] > 0]
+
+            def send_part(bound: Tuple[int, int]) -> str:
+                part_url = self._create(bound[1], {"Upload-Concat": "partial"})
+                self._send_range(part_url, file_path, bound[0], bound[1])
+                return part_url
+
+            with ThreadPoolExecutor(max_workers=len(bounds), thread_name_prefix="tus-part") as pool:
+                part_urls = list(pool.map(send_part, bounds))
+            self._with_retry(lambda: self._request(
+                "POST", self.endpoint, (201,),
+                headers={"Upload-Concat": "final;" + " ".join(part_urls), **encoded},
+            ))
+            parts = len(bounds)
+        else:
+            parts = 1
+            url = self._create(size, encoded)
+            self._send_range(url, file_path, 0, size)
+
+        return UploadMetrics(
+            bytes_sent=size,
+            seconds=time.perf_counter() - t0,
+            chunks=self._chunks,
+            retries=self._retries,
+            parts=parts,
+        )
@@ -1,38 +1,167 @@
 """Supabase Storage service for file uploads and signed URLs."""
-from supabase import create_client, Client
-from typing import Optional
+from typing import Dict, List, Optional, Union
 from datetime import datetime, timedelta
 import os
 
 from app.core.config import settings
+from app.core.tracing import log
+from app.services.clients import get_supabase
+from app.services.executor import processing_executor
+
+
+def _read_file(file_path: str) -> bytes:
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+def _write_file(file_path: str, data: bytes):
+    with open(file_path, "wb") as f:
+        f.write(data)
 
 
 class StorageService:
-    """Service for interacting with Supabase Storage."""
+    """
+    Service for interacting with Supabase Storage (async, on the shared connection pool).
+    Local file reads/writes and resumable uploads run on the I/O threads.
+    """
     
     def __init__(self):
-        self.client: Client = create_client(settings.supabase_url, settings.supabase_service_key)
         self.bucket_name = settings.storage_bucket_name
     
-    def upload_file(
+    async def _bucket(self):
+        return (await get_supabase()).storage.from_(self.bucket_name)
+    
+    async def upload_file(
+        self,
+        file_path: str,
+        storage_path: str,
+        content_type: str = "application/zip",
+        upsert: bool = False,
+    ) -> bool:
+        """
+        Upload a file to Supabase Storage; large files go through resumable_upload.
+        upsert overwrites an existing object.
+        """
+        threshold_mb = settings.storage_resumable_min_mb
+        if threshold_mb is not None and os.path.getsize(file_path) >= threshold_mb * 1024 * 1024:
+            return await processing_executor.run_io(
+                self.upload_file_resumable, file_path, storage_path, content_type, upsert
+            )
+        try:
+            data = await processing_executor.run_io(_read_file, file_path)
+        except OSError as e:
+            log(f"Error uploading file: {e}")
+            return False
+        return await self.upload_bytes(data, storage_path, content_type, upsert=upsert)
+    
+    async def upload_bytes(
+        self,
+        data: bytes,
+        storage_path: str,
+        content_type: str = "application/pdf",
+        upsert: bool = False,
+    ) -> bool:
+        """Upload in-memory data to Supabase Storage; upsert overwrites an existing object."""
+        try:
+            await (await self._bucket()).upload(
+                path=storage_path,
+                file=data,
+                file_options={"content-type": content_type, "upsert": "true" if upsert else "false"}
+            )
+            return True
+        except Exception as e:
+            log(f"Error uploading file: {e}")
+            return False
+    
+    async def upload_content(
+        self,
+        content: Union[str, bytes],
+        storage_path: str,
+        content_type: str = "application/zip",
+        upsert: bool = False,
+    ) -> bool:
+        """Upload a local file (given by path) or in-memory data, e.g. from a run that never touched disk."""
+        if isinstance(content, str):
+            return await self.upload_file(content, storage_path, content_type, upsert=upsert)
+        return await self.upload_bytes(content, storage_path, content_type, upsert=upsert)
+    
+    def upload_file_resumable(
         self,
         file_path: str,
         storage_path: str,
+        content_type: str = "application/zip",
+        upsert: bool = False,
     ) -> bool:
-        """Upload a file to Supabase Storage."""
+        """Upload a file in chunks over TUS, retrying and resuming failed chunks (blocking)."""
+        from app.services.resumable_upload import TusUploader, UploadError
+        
+        uploader = TusUploader(
+            endpoint=f"{settings.supabase_url.rstrip('/')}/storage/v1/upload/resumable",
+            headers={
+                "Authorization": f"Bearer {settings.supabase_service_key}",
+                "apikey": settings.supabase_service_key,
+                "x-upsert": "true" if upsert else "false",
+            },
+            parallel_parts=settings.storage_upload_parallel_parts,
+            max_retries=settings.storage_upload_max_retries,
+        )
+        try:
+            metrics = uploader.upload(file_path, {
+                "bucketName": self.bucket_name,
+                "objectName": storage_path,
+                "contentType": content_type,
+            })
+        except (UploadError, OSError) as e:
+            log(f"Error uploading file: {e}")
+            return False
+        log(
+            f"Uploaded {storage_path}: {metrics.bytes_sent} bytes in {metrics.seconds:.1f}s "
+            f"({metrics.throughput_mb_s:.1f} MB/s, {metrics.chunks} chunks, {metrics.retries} retries)"
+        )
+        return True
+    
+    async def download_bytes(self, storage_path: str) -> Optional[bytes]:
+        """Download a file from Supabase Storage into memory."""
+        try:
+            return await (await self._bucket()).download(storage_path)
+        except Exception as e:
+            log(f"Error downloading file: {e}")
+            return None
+    
+    async def list_files(self, prefix: str, page_size: int = 1000) -> List[dict]:
+        """List the objects directly under a folder: [{"name", "size"}], sorted by name."""
+        bucket = await self._bucket()
+        files: List[dict] = []
+        offset = 0
+        while True:
+            page = await bucket.list(prefix, {
+                "limit": page_size,
+                "offset": offset,
+                "sortBy": {"column": "name", "order": "asc"},
+            })
+            for entry in page:
+                if entry.get("id") is None:  # sub-folder placeholder
+                    continue
+                files.append({"name": entry["name"], "size": (entry.get("metadata") or {}).get("size")})
+            if len(page) < page_size:
+                return files
+            offset += page_size
+    
+    async def download_file(
+        self,
+        storage_path: str,
+        file_path: str,
+    ) -> bool:
+        """Download a file from Supabase Storage to a local path."""
         try:
-            with open(file_path, "rb") as f:
-                self.client.storage.from_(self.bucket_name).upload(
-                    path=storage_path,
-                    file=f,
-                    file_options={"content-type": "application/zip"}
-                )
+            data = await (await self._bucket()).download(storage_path)
+            await processing_executor.run_io(_write_file, file_path, data)
             return True
         except Exception as e:
-            print(f"Error uploading file: {e}")
+            log(f"Error downloading file: {e}")
             return False
     
-    def create_signed_url(
+    async def create_signed_url(
         self,
         storage_path: str,
         expires_in_days: Optional[int] = None,
@@ -45,22 +174,58 @@ class StorageService:
         expires_at_timestamp = int(expires_at.timestamp())
         
         try:
-            result = self.client.storage.from_(self.bucket_name).create_signed_url(
+            result = await (await self._bucket()).create_signed_url(
                 path=storage_path,
                 expires_in=expires_in_days * 24 * 60 * 60,  # Convert days to seconds
             )
             return result.get("signedURL")
         except Exception as e:
-            print(f"Error creating signed URL: {e}")
+            log(f"Error creating signed URL: {e}")
             return None
     
-    def delete_file(self, storage_path: str) -> bool:
+    async def create_signed_urls(
+        self,
+        storage_paths: List[str],
+        expires_in_days: Optional[int] = None,
+    ) -> Dict[str, str]:
+        """Create signed download URLs for many files in one request: {storage_path: url}."""
+        if expires_in_days is None:
+            expires_in_days = settings.download_url_expiry_days
+        if not storage_paths:
+            return {}
+        
+        try:
+            result = await (await self._bucket()).create_signed_urls(
+                paths=storage_paths,
+                expires_in=expires_in_days * 24 * 60 * 60,
+            )
+            return {item["path"]: item["signedURL"] for item in result if not item.get("error")}
+        except Exception as e:
+            log(f"Error creating signed URLs: {e}")
+            return {}
+    
+    async def copy_file(self, from_path: str, to_path: str, upsert: bool = False) -> bool:
+        """
+        Copy an object within the bucket (server-side, no download).
+        Copies cannot overwrite, so with upsert an existing to_path is removed first.
+        """
+        try:
+            bucket = await self._bucket()
+            if upsert:
+                await bucket.remove([to_path])
+            await bucket.copy(from_path, to_path)
+            return True
+        except Exception as e:
+            log(f"Error copying file: {e}")
+            return False
+    
+    async def delete_file(self, storage_path: str) -> bool:
         """Delete a file from storage."""
         try:
-            self.client.storage.from_(self.bucket_name).remove([storage_path])
+            await (await self._bucket()).remove([storage_path])
             return True
         except Exception as e:
-            print(f"Error deleting file: {e}")
+            log(f"Error deleting file: {e}")
             return False
 
 
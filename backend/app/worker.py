@@ -0,0 +1,222 @@
+"""
+Queue worker entry point.
+
+Claims submissions from the job queue and runs them through the processing
+pipeline, so API pods only accept uploads and workers scale separately.
+
+    python -m app.worker --workers 4
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+import uuid
+from typing import Optional, Tuple, Union
+
+from app.core.config import settings
+from app.core.tracing import log, reset_trace_id, set_trace_id
+from app.services.clients import close_clients
+from app.services.database import TERMINAL_STATUSES, db_service
+from app.services.executor import processing_executor
+from app.services.job_queue import Job, get_job_queue
+from app.services.pdf_processor import process_pdf_async
+from app.services.storage import storage_service
+
+
+# Delay before retrying a lease renewal that raised
+LEASE_RETRY_SECONDS = 5.0
+
+
+class LeaseLost(Exception):
+    """The worker no longer holds a job's lease, so another worker may be running it."""
+
+
+async def _keep_lease(job: Job, worker_id: str, queue, lease_seconds: int, work: "asyncio.Task") -> bool:
+    """
+    Renew the job's lease until cancelled; renewing at a third of the lease leaves room for slow calls.
+    Renewal errors are retried for as long as the last renewal is still valid.
+    Once the lease is lost (or has run out), work is cancelled so this worker
+    stops processing, and never finishes, a job it no longer owns.
+    Returns: True if work was cancelled
+    """
+    interval = max(1.0, lease_seconds / 3)
+    retry = min(interval, LEASE_RETRY_SECONDS)
+    renewed_at = time.monotonic()
+    delay = interval
+    while True:
+        await asyncio.sleep(delay)
+        try:
+            held = await processing_executor.run_io(queue.renew, job.submission_id, worker_id, lease_seconds)
+        except Exception as e:
+            log(f"[{worker_id}] Error renewing lease on {job.submission_id}: {e}")
+            held = None
+        if held:
+            renewed_at = time.monotonic()
+            delay = interval
+            continue
+        if held is None and time.monotonic() + retry - renewed_at < lease_seconds:
+            delay = retry
+            continue
+        log(f"[{worker_id}] Lost lease on {job.submission_id}; stopping the job")
+        work.cancel()
+        return True
+
+
+async def _fetch_input(job: Job) -> Tuple[Union[str, bytes], Optional[str]]:
+    """
+    The job's PDF: a local path, or its bytes when it is small enough to
+    process from memory (settings.in_memory_max_mb), downloading it from storage when needed.
+    Returns: (path or bytes, temporary directory the caller removes when done, or None)
+    """
+    local_path = job.payload.get("pdf_file_path")
+    if local_path:
+        return local_path, None
+
+    file_size = job.payload.get("file_size")
+    if file_size is not None and file_size <= settings.in_memory_max_bytes:
+        data = await storage_service.download_bytes(job.payload["pdf_storage_path"])
+        if data is None:
+            raise Exception("Failed to download input PDF from storage")
+        return data, None
+
+    temp_dir = tempfile.mkdtemp(prefix="beo_job_")
+    local_path = os.path.join(temp_dir, "input.pdf")
+    if not await storage_service.download_file(job.payload["pdf_storage_path"], local_path):
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise Exception("Failed to download input PDF from storage")
+    return local_path, temp_dir
+
+
+async def _process_job(job: Job):
+    """
+    Run the pipeline on a job unless its submission already reached a terminal
+    status (a retry or duplicate claim), then delete the uploaded input, which
+    is only kept until then.
+    """
+    row = await db_service.get_submission(job.submission_id, use_cache=False)
+    if row and row.get("status") in TERMINAL_STATUSES:
+        log(f"Submission {job.submission_id} is already {row['status']}; skipping")
+    else:
+        await _run_pipeline(job)
+    storage_path = job.payload.get("pdf_storage_path")
+    if storage_path:
+        await storage_service.delete_file(storage_path)
+
+
+async def _run_pipeline(job: Job):
+    pdf_input, temp_dir = await _fetch_input(job)
+    try:
+        # process_pdf_async records completed/failed itself
+        await process_pdf_async(
+            submission_id=job.submission_id,
+            pdf_file_path=pdf_input if isinstance(pdf_input, str) else None,
+            pdf_data=pdf_input if isinstance(pdf_input, bytes) else None,
+            name=job.payload.get("name", ""),
+            email=job.payload.get("email", ""),
+            event_name=job.payload.get("event_name"),
+            content_sha256=job.payload.get("content_sha256"),
+            trace_id=job.payload.get("trace_id"),
+        )
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+async def run_job(job: Job, worker_id: str, queue=None, lease_seconds: Optional[int] = None):
+    """
+    Process one claimed job while keeping its lease alive. Its tasks inherit the
+    caller's trace ID.
+    Raises LeaseLost (without finishing the job) if the lease could not be kept.
+    """
+    queue = queue or get_job_queue()
+    lease_seconds = lease_seconds or settings.job_lease_seconds
+    work = asyncio.create_task(_process_job(job))
+    heartbeat = asyncio.create_task(_keep_lease(job, worker_id, queue, lease_seconds, work))
+    try:
+        await work
+    except asyncio.CancelledError:
+        if heartbeat.done() and not heartbeat.cancelled() and heartbeat.result():
+            raise LeaseLost(f"Lease on {job.submission_id} lost while processing") from None
+        raise
+    finally:
+        heartbeat.cancel()
+    # Only drop the lease once the job ran; on errors above it expires and is retried.
+    await processing_executor.run_io(queue.finish, job.submission_id, worker_id)
+
+
+async def worker_loop(worker_id: str, stop: asyncio.Event, queue=None):
+    """Claim and run jobs until stop is set; the current job is always finished first."""
+    queue = queue or get_job_queue()
+    while not stop.is_set():
+        try:
+            job = await processing_executor.run_io(
+                queue.claim, worker_id, settings.job_lease_seconds, settings.job_max_attempts
+            )
+        except Exception as e:
+            log(f"[{worker_id}] Error claiming job: {e}")
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.job_poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        # Tags this job's log lines, including those of the tasks run_job starts
+        trace_token = set_trace_id(job.payload.get("trace_id"))
+        try:
+            log(f"[{worker_id}] Processing {job.submission_id} (attempt {job.attempts})")
+            await run_job(job, worker_id, queue)
+        except Exception as e:
+            # The lease expires and another worker retries the job.
+            log(f"[{worker_id}] Job {job.submission_id} failed: {e}")
+        finally:
+            reset_trace_id(trace_token)
+
+
+async def run_workers(count: int, queue=None):
+    """Run `count` worker loops until SIGINT/SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    prefix = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    try:
+        await asyncio.gather(*(worker_loop(f"{prefix}-{i}", stop, queue) for i in range(count)))
+    finally:
+        processing_executor.shutdown()
+        await close_clients()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process queued BEO submissions.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.processing_workers,
+        help="Concurrent jobs in this process (default: PROCESSING_WORKERS)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=settings.worker_metrics_port,
+        help="Serve Prometheus metrics on this port (default: WORKER_METRICS_PORT; off if unset)",
+    )
+    args = parser.parse_args(argv)
+    if args.metrics_port:
+        from prometheus_client import start_http_server
+        start_http_server(args.metrics_port)
+    asyncio.run(run_workers(max(1, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
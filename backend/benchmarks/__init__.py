@@ -0,0 +1 @@
+# Benchmarks and verification scripts for the BEO splitter
@@ -0,0 +1,91 @@
+"""
+Benchmark: per-page insert_pdf copies vs one insert_pdf per contiguous run.
+
+Classifies a generated packet once, then times only the output stage for
+  - per_page: one insert_pdf call per page (the original split_pdf behaviour)
+  - runs:     one insert_pdf call per contiguous run (plan_page_runs)
+  - select:   runs, but non-contiguous BEOs built with select() on a copy
+and reports wall time and total output bytes for each.
+
+Usage (from backend/):
+    python -m benchmarks.bench_insert [--pages 800] [--revisit 0.05]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from app.core.beo_split import (
+    SELECT_SAVE_GARBAGE,
+    PageResult,
+    build_bucket_docs,
+    classify_pages,
+    page_bucket,
+    plan_page_runs,
+)
+from benchmarks.packets import make_packet
+
+
+def _save_all(outputs: Dict[str, "fitz.Document"], outdir: str, garbage: int = 0) -> int:
+    total = 0
+    for bucket, outdoc in outputs.items():
+        path = os.path.join(outdir, f"{bucket}.pdf")
+        outdoc.save(path, garbage=garbage)
+        outdoc.close()
+        total += os.path.getsize(path)
+    return total
+
+
+def per_page_outputs(doc: "fitz.Document", results: List[PageResult]) -> Dict[str, "fitz.Document"]:
+    outputs: Dict[str, fitz.Document] = {}
+    for r in results:
+        idx = r.page_number - 1
+        bucket = page_bucket(r)
+        if bucket not in outputs:
+            outputs[bucket] = fitz.open()
+        outputs[bucket].insert_pdf(doc, from_page=idx, to_page=idx)
+    return outputs
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--pages", type=int, default=800)
+    ap.add_argument("--revisit", type=float, default=0.05, help="chance a BEO reappears later")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="beo_bench_")
+    try:
+        packet = os.path.join(work, "packet.pdf")
+        make_packet(packet, args.pages, seed=args.seed, revisit_ratio=args.revisit)
+        doc = fitz.open(packet)
+        results = classify_pages(doc)
+        runs = plan_page_runs(results)
+        print(f"packet: {args.pages} pages, {os.path.getsize(packet)} bytes, {len(runs)} runs")
+
+        # select() copies carry the whole input until garbage-collected on save.
+        variants = {
+            "per_page": (lambda: per_page_outputs(doc, results), 0),
+            "runs": (lambda: build_bucket_docs(doc, runs), 0),
+            "select": (lambda: build_bucket_docs(doc, runs, input_pdf=packet), SELECT_SAVE_GARBAGE),
+        }
+        for name, (build, garbage) in variants.items():
+            outdir = os.path.join(work, name)
+            os.makedirs(outdir)
+            t0 = time.perf_counter()
+            size = _save_all(build(), outdir, garbage)
+            elapsed = time.perf_counter() - t0
+            print(f"{name:>9}: {elapsed:7.3f} s  {size:>12,d} bytes")
+        doc.close()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
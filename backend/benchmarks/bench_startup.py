@@ -0,0 +1,97 @@
+"""
+Benchmark: import time of the application entry points, via python -X importtime.
+
+Imports each module in a fresh interpreter, reports its cumulative import time
+(best of --runs) and fails if a module pulls in something it must not load at
+import: the splitter stays free of the service stack, and the API and worker
+defer Supabase, httpx and PyMuPDF until first use. --max-ms also fails on a
+slow import, for use as a regression guard in CI.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup [--runs 5] [--max-ms 1500]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Module -> packages it must not import at import time
+FORBIDDEN = {
+    "app.core.beo_split": ("app.core.config", "app.services", "supabase", "httpx", "fastapi"),
+    "app.main": ("supabase", "httpx", "fitz", "pymupdf"),
+    "app.worker": ("supabase", "httpx", "fitz", "pymupdf"),
+}
+
+# Settings needed to import app.core.config; real values are never used
+DUMMY_ENV = {
+    "API_SECRET_KEY": "bench",
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "bench",
+    "SUPABASE_SERVICE_KEY": "bench",
+    "POSTMARK_API_KEY": "bench",
+    "POSTMARK_FROM_EMAIL": "bench@example.com",
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(module: str) -> Tuple[float, Dict[str, int]]:
+    """
+    Import module in a fresh interpreter.
+    Returns: (cumulative import time in ms, {imported module: cumulative µs})
+    """
+    env = {**DUMMY_ENV, **os.environ}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    imported: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            imported[match.group(4)] = int(match.group(2))
+    return imported.get(module, 0) / 1000, imported
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--max-ms", type=float, default=None, help="Fail if any module imports slower than this")
+    ap.add_argument("--top", type=int, default=5, help="Slowest imports to list per module")
+    args = ap.parse_args(argv)
+
+    ok = True
+    for module, forbidden in FORBIDDEN.items():
+        best = None
+        for _ in range(max(1, args.runs)):
+            ms, imported = import_profile(module)
+            if best is None or ms < best[0]:
+                best = (ms, imported)
+        ms, imported = best
+        leaked = sorted(
+            name for name in imported
+            if any(name == f or name.startswith(f + ".") for f in forbidden)
+        )
+        roots = sorted({name.split(".")[0] if not name.startswith("app.") else name for name in leaked})
+        slow = args.max_ms is not None and ms > args.max_ms
+        ok = ok and not leaked and not slow
+        status = "FAIL" if leaked or slow else "ok"
+        print(f"{module:<20} {ms:8.1f} ms  {len(imported):4d} modules  {status}")
+        if leaked:
+            print(f"    imports at startup: {', '.join(roots)}")
+        top = sorted(
+            ((us, name) for name, us in imported.items() if name != module and "." not in name),
+            reverse=True,
+        )[:args.top]
+        print("    slowest: " + ", ".join(f"{name} {us / 1000:.0f} ms" for us, name in top))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
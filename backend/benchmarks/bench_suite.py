@@ -0,0 +1,239 @@
+"""
+Benchmark suite: splitter throughput, memory and output size across packet sizes.
+
+For every generated packet (--profiles x --sizes, see benchmarks.packets.PROFILES)
+each stage runs in a fresh process, so peak RSS belongs to that stage alone:
+  - analyze:   analyze_pdf (classification only, no output)
+  - split:     split_pdf to loose per-BEO PDFs
+  - split_zip: split_pdf streaming the PDFs into a zip
+  - split_zip_bounded: split_zip with at most --max-open-writers outputs held open
+  - split_zip_memory: split_zip from the packet's bytes into an in-memory zip (no temp files)
+Reports pages/sec, peak RSS and output bytes per stage, checks the BEO count
+against the generator's ground truth, and saves or compares JSON baselines
+(a regression beyond --tolerance fails the run). Generated packets are cached
+in --packet-dir, since 5,000-page packets take a while to build.
+
+Usage (from backend/):
+    python -m benchmarks.bench_suite [--sizes 10,100,1000,5000] [--profiles mixed,basic]
+        [--repeat 3] [--save benchmarks/baselines/local.json] [--compare benchmarks/baselines/local.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core.pools import spawn_pool
+from benchmarks.packets import GENERATOR_VERSION, PROFILES, make_packet
+
+STAGES = ("analyze", "split", "split_zip", "split_zip_bounded", "split_zip_memory")
+# Metric -> True if higher is better; compared against baselines
+METRICS = {"pages_per_sec": True, "peak_rss_mb": False, "output_bytes": False}
+
+
+def packet_for(packet_dir: str, profile: str, pages: int, seed: int) -> Tuple[str, dict]:
+    """
+    Path and ground truth of a generated packet, building it on first use.
+    Returns: (pdf path, truth dict from make_packet)
+    """
+    os.makedirs(packet_dir, exist_ok=True)
+    base = os.path.join(packet_dir, f"{profile}_{pages}_s{seed}_g{GENERATOR_VERSION}")
+    pdf_path, truth_path = base + ".pdf", base + ".json"
+    if os.path.exists(pdf_path) and os.path.exists(truth_path):
+        with open(truth_path, encoding="utf-8") as f:
+            return pdf_path, json.load(f)
+    truth: dict = {}
+    make_packet(pdf_path + ".tmp", pages, seed=seed, truth=truth, **PROFILES[profile])
+    os.replace(pdf_path + ".tmp", pdf_path)
+    with open(truth_path, "w", encoding="utf-8") as f:
+        json.dump(truth, f)
+    return pdf_path, truth
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def _peak_rss_mb() -> float:
+    """
+    This process's peak RSS in MiB. On Linux ru_maxrss survives exec, so a child
+    spawned by a parent that grew large (e.g. building packets) would report the
+    parent's peak; VmHWM in /proc/self/status is this process image's own.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024  # kB
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_stage(stage: str, packet: str, workdir: str, max_open_writers: int = 32) -> dict:
+    """
+    Run one stage on packet (in a fresh pool process).
+    Returns: seconds, pages, beos, output_bytes and peak_rss_mb (whole process, MiB)
+    """
+    from app.core.beo_split import analyze_pdf, split_pdf
+
+    outdir = os.path.join(workdir, stage)
+    results: list = []
+    t0 = time.perf_counter()
+    if stage == "analyze":
+        analysis = analyze_pdf(packet)
+        pages, beos, output_bytes = analysis.page_count, analysis.beo_count, 0
+    elif stage == "split_zip_memory":
+        with open(packet, "rb") as f:
+            data = f.read()
+        zip_buffer = io.BytesIO()
+        beos, _, _ = split_pdf(data, outdir, page_results=results, zip_path=zip_buffer)
+        pages, output_bytes = len(results), zip_buffer.getbuffer().nbytes
+    else:
+        zip_path = os.path.join(workdir, f"{stage}.zip") if stage.startswith("split_zip") else None
+        beos, _, _ = split_pdf(
+            packet, outdir, page_results=results, zip_path=zip_path,
+            max_open_writers=max_open_writers if stage == "split_zip_bounded" else None,
+        )
+        pages = len(results)
+        output_bytes = os.path.getsize(zip_path) if zip_path else _dir_bytes(outdir)
+    seconds = time.perf_counter() - t0
+    rss_mb = _peak_rss_mb()
+    return {
+        "seconds": round(seconds, 4),
+        "pages": pages,
+        "beos": beos,
+        "output_bytes": output_bytes,
+        "peak_rss_mb": round(rss_mb, 1),
+    }
+
+
+def measure(stage: str, packet: str, repeat: int, max_open_writers: int = 32) -> dict:
+    """Best (fastest) of `repeat` runs, each in its own spawned process."""
+    best = None
+    for _ in range(max(1, repeat)):
+        workdir = tempfile.mkdtemp(prefix="beo_bench_")
+        try:
+            with spawn_pool(1) as pool:
+                result = pool.submit(run_stage, stage, packet, workdir, max_open_writers).result()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    best["pages_per_sec"] = round(best["pages"] / best["seconds"], 1) if best["seconds"] else 0.0
+    return best
+
+
+def environment() -> dict:
+    import fitz  # PyMuPDF
+
+    from app.core.beo_split import SPLITTER_VERSION
+
+    return {
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "splitter_version": SPLITTER_VERSION,
+        "generator_version": GENERATOR_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results: List[dict], baseline: dict, tolerance: float) -> List[str]:
+    """
+    Print each result's change against the baseline run with the same profile, size and stage.
+    Returns: descriptions of the regressions beyond tolerance
+    """
+    previous: Dict[Tuple[str, int, str], dict] = {
+        (r["profile"], r["pages"], r["stage"]): r for r in baseline.get("results", [])
+    }
+    regressions = []
+    print(f"\nvs baseline from {baseline.get('environment', {}).get('timestamp', '?')}:")
+    for r in results:
+        key = (r["profile"], r["pages"], r["stage"])
+        old = previous.get(key)
+        if old is None:
+            continue
+        changes = []
+        for metric, higher_is_better in METRICS.items():
+            before, after = old.get(metric) or 0, r[metric]
+            if not before:
+                continue
+            delta = (after - before) / before
+            changes.append(f"{metric} {delta:+.1%}")
+            worse = -delta if higher_is_better else delta
+            if worse > tolerance:
+                regressions.append(f"{key[0]}/{key[1]}/{key[2]}: {metric} {before} -> {after} ({delta:+.1%})")
+        print(f"{key[0]:>14} {key[1]:>6} {key[2]:<17} " + "  ".join(changes))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", default="10,100,1000", help="Comma-separated page counts (10-5000)")
+    ap.add_argument("--profiles", default="mixed", help=f"Comma-separated: {', '.join(PROFILES)}")
+    ap.add_argument("--stages", default=",".join(STAGES))
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--max-open-writers", type=int, default=32, help="Open output cap for split_zip_bounded")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per stage; the fastest is kept")
+    ap.add_argument("--packet-dir", default=os.path.join(tempfile.gettempdir(), "beo_bench_packets"))
+    ap.add_argument("--save", help="Write results as a JSON baseline")
+    ap.add_argument("--compare", help="Compare against a JSON baseline")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression (default 0.15)")
+    args = ap.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    profiles = [p for p in args.profiles.split(",") if p]
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = [p for p in profiles if p not in PROFILES] + [s for s in stages if s not in STAGES]
+    if unknown:
+        ap.error(f"unknown profile/stage: {', '.join(unknown)}")
+
+    ok = True
+    results = []
+    print(f"{'profile':>14} {'pages':>6} {'stage':<17} {'pages/s':>9} {'peak RSS':>10} {'output':>14}  beos")
+    for profile in profiles:
+        for pages in sizes:
+            packet, truth = packet_for(args.packet_dir, profile, pages, args.seed)
+            for stage in stages:
+                r = measure(stage, packet, args.repeat, args.max_open_writers)
+                correct = r["beos"] == truth["beos"]
+                ok = ok and correct
+                results.append({"profile": profile, "stage": stage, **r, "pages": pages, "expected_beos": truth["beos"]})
+                print(
+                    f"{profile:>14} {pages:>6} {stage:<17} {r['pages_per_sec']:>9.1f} "
+                    f"{r['peak_rss_mb']:>7.1f} MB {r['output_bytes']:>14,d}  {r['beos']}"
+                    + ("" if correct else f" (expected {truth['beos']})"),
+                    flush=True,
+                )
+
+    report = {"environment": {**environment(), "max_open_writers": args.max_open_writers}, "results": results}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        ok = ok and not regressions
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline: {args.save}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Benchmark: split to disk + ZIP_DEFLATED re-read vs streaming STORED entries.
+
+Classifies a generated packet once, then times only the output + zip stage for
+  - deflate: save every PDF to disk, then zip them with ZIP_DEFLATED (the old pipeline)
+  - stored:  split_pdf(zip_path=...), each PDF added as a STORED entry as it is written
+and reports wall time and archive size for each. Synthetic packets have many
+tiny content streams, so they overstate what DEFLATE saves on real packets.
+
+Usage (from backend/):
+    python -m benchmarks.bench_zip [--pages 1500] [--packet real_packet.pdf]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from typing import List, Optional
+
+from app.core.beo_split import analyze_pdf, split_pdf
+from benchmarks.packets import make_packet
+
+
+def deflate_zip(packet: str, outdir: str, zip_path: str, analysis) -> None:
+    _, _, report_path = split_pdf(packet, outdir, analysis=analysis)
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for file in os.listdir(outdir):
+            if file.endswith(".pdf") and (file.startswith("BEO_") or file.startswith("BC_")):
+                zipf.write(os.path.join(outdir, file), file)
+        zipf.write(report_path, "split_report.csv")
+
+
+def stored_zip(packet: str, outdir: str, zip_path: str, analysis) -> None:
+    split_pdf(packet, outdir, analysis=analysis, zip_path=zip_path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--pages", type=int, default=1500)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--packet", help="benchmark this PDF instead of a generated packet")
+    args = ap.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="beo_bench_")
+    try:
+        packet = args.packet
+        if not packet:
+            packet = os.path.join(work, "packet.pdf")
+            make_packet(packet, args.pages, seed=args.seed)
+        analysis = analyze_pdf(packet)
+        print(f"packet: {analysis.page_count} pages, {os.path.getsize(packet):,d} bytes, {analysis.beo_count} BEOs")
+
+        for name, build in (("deflate", deflate_zip), ("stored", stored_zip)):
+            outdir = os.path.join(work, name)
+            zip_path = os.path.join(work, f"{name}.zip")
+            t0 = time.perf_counter()
+            build(packet, outdir, zip_path, analysis)
+            elapsed = time.perf_counter() - t0
+            with zipfile.ZipFile(zip_path) as zipf:
+                entries = len(zipf.namelist())
+            print(f"{name:>8}: {elapsed:7.3f} s  {os.path.getsize(zip_path):>12,d} bytes  {entries} entries")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
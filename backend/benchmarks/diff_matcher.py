@@ -0,0 +1,171 @@
+"""
+Differential check: single-scan BEO matcher vs the original regex cascade.
+
+Generates a corpus of page texts mixing every label form the cascade knows
+about (plus near misses, reference notes and odd whitespace) and asserts that
+match_beo_number() makes the same (beo, status, matches) decision as the
+original step-by-step cascade for every page.
+
+Usage (from backend/):
+    python -m benchmarks.diff_matcher [--pages 20000] [--seed 0]
+"""
+import argparse
+import random
+import sys
+import time
+from typing import List, Optional, Set, Tuple
+
+from app.core.beo_split import (
+    BEO_BANQUET_ORDER_NEXT_LINE_RE,
+    BEO_BANQUET_ORDER_RE,
+    BEO_COLON_RE,
+    BEO_HASH_NO_SPACE_RE,
+    BEO_LOOSE_RE,
+    REFERENCE_LINE_HINTS,
+    PageText,
+    match_beo_number,
+)
+
+
+def _m(regex, text: str) -> Set[str]:
+    return set(regex.findall(text or ""))
+
+
+def legacy_cascade(page_text: PageText) -> Tuple[Optional[str], str, Set[str]]:
+    """The original 12-step cascade, kept verbatim as the reference implementation."""
+    hf_text = page_text.hf_text
+    upper_left_text = page_text.upper_left_text
+    full_text = page_text.full_text
+
+    steps = [
+        _m(BEO_BANQUET_ORDER_RE, hf_text),
+        _m(BEO_BANQUET_ORDER_RE, full_text),
+        _m(BEO_BANQUET_ORDER_NEXT_LINE_RE, hf_text),
+        _m(BEO_BANQUET_ORDER_NEXT_LINE_RE, full_text),
+        _m(BEO_COLON_RE, upper_left_text) | _m(BEO_HASH_NO_SPACE_RE, upper_left_text),
+        _m(BEO_LOOSE_RE, upper_left_text),
+        _m(BEO_HASH_NO_SPACE_RE, hf_text),
+        _m(BEO_HASH_NO_SPACE_RE, full_text),
+        _m(BEO_COLON_RE, hf_text),
+        _m(BEO_COLON_RE, full_text),
+        _m(BEO_LOOSE_RE, hf_text),
+    ]
+    for m in steps:
+        if len(m) == 1:
+            return next(iter(m)), "OK", m
+        if len(m) > 1:
+            return None, "AMBIGUOUS", m
+
+    candidates: Set[str] = set()
+    for line in (full_text or "").splitlines():
+        u = line.upper()
+        if any(h in u for h in REFERENCE_LINE_HINTS):
+            continue
+        candidates |= _m(BEO_LOOSE_RE, line)
+
+    if len(candidates) == 1:
+        return next(iter(candidates)), "OK", candidates
+    if len(candidates) == 0:
+        return None, "UNKNOWN", set()
+    return None, "AMBIGUOUS", candidates
+
+
+_WS = [" ", "", "  ", "\n", " \n ", "\t", "\r\n", "\x0c"]
+_LABELS = [
+    "Banquet Event Order{ws}:{ws2}{num}",
+    "BANQUET EVENT ORDER{ws}{num}",
+    "banquet  event order{ws}:{ws2}{num}",
+    "BEO#:{ws2}{num}",
+    "BEO{ws}#{ws}:{ws2}{num}",
+    "BEO{ws}{num}",
+    "BEO:{ws2}{num}",
+    "BEO #{ws2}{num}",
+    "beo # {num}",
+    "BEO #: {num}x",
+    "XBEO #: {num}",
+    "Banquet Event Order: {num}",
+]
+_FILLER = [
+    "Menu: Chicken Marsala",
+    "Setup 7:00 AM",
+    "Room 1234 Ballroom",
+    "Banquet Check",
+    "Guarantee 150",
+    "Reference BEO# {num}",
+    "Refer to BEO #: {num}",
+    "Split BEO {num} next day",
+    "FROM BEO {num}",
+    "Also occurring in BEO 4567",
+]
+
+
+# Typical BEO body copy; real pages carry a few KB of menu/setup text around the labels.
+_BODY = (
+    "Coffee Break 10:00 AM - 10:30 AM  Ballroom A  Guarantee: 150  Set: 155\n"
+    "Freshly brewed regular and decaffeinated coffee, selection of hot teas\n"
+    "Assorted soft drinks and bottled waters, seasonal whole fruit\n"
+    "Audio Visual: LCD projector, screen, podium microphone, 2 wireless lavaliers\n"
+)
+
+
+def _number(rnd: random.Random, pool: List[str]) -> str:
+    if rnd.random() < 0.1:
+        return str(rnd.randint(1, 99))  # too short to match
+    return rnd.choice(pool)
+
+
+def _fragment(rnd: random.Random, pool: List[str]) -> str:
+    tpl = rnd.choice(_LABELS) if rnd.random() < 0.6 else rnd.choice(_FILLER)
+    return tpl.format(ws=rnd.choice(_WS), ws2=rnd.choice(_WS), num=_number(rnd, pool))
+
+
+def _region(rnd: random.Random, pool: List[str], max_parts: int) -> str:
+    parts = [_fragment(rnd, pool) for _ in range(rnd.randint(0, max_parts))]
+    return "".join(p + rnd.choice(["\n", " ", "\n\n", "\r\n"]) for p in parts)
+
+
+def generate_corpus(pages: int, seed: int = 0) -> List[PageText]:
+    """Generate page texts; header/footer and upper-left regions reuse full-text fragments."""
+    rnd = random.Random(seed)
+    corpus: List[PageText] = []
+    for _ in range(pages):
+        pool = [str(rnd.randint(100, 99999999)) for _ in range(rnd.randint(1, 3))]
+        hf = _region(rnd, pool, 2)
+        ul = _region(rnd, pool, 1) if rnd.random() < 0.5 else ""
+        body = _region(rnd, pool, 4) + _BODY * rnd.randint(2, 12)
+        corpus.append(PageText(full_text=hf + ul + body, hf_text=hf, upper_left_text=ul, extract_seconds=0.0))
+    return corpus
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--pages", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    corpus = generate_corpus(args.pages, args.seed)
+
+    t0 = time.perf_counter()
+    expected = [legacy_cascade(pt) for pt in corpus]
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    actual = [match_beo_number(pt)[:3] for pt in corpus]
+    t_single = time.perf_counter() - t0
+
+    mismatches = [i for i, (e, a) in enumerate(zip(expected, actual)) if e != a]
+    statuses = {s: sum(1 for e in expected if e[1] == s) for s in ("OK", "UNKNOWN", "AMBIGUOUS")}
+    print(f"pages: {len(corpus)}  {statuses}")
+    print(f"legacy cascade: {t_legacy * 1000:.1f} ms  single scan: {t_single * 1000:.1f} ms")
+    for i in mismatches[:10]:
+        print(f"MISMATCH page {i}: expected {expected[i]} got {actual[i]}")
+        print(f"  {corpus[i]!r}")
+    if mismatches:
+        print(f"{len(mismatches)} mismatches")
+        return 1
+    print("OK: identical decisions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Synthetic BEO packet generator for benchmarks."""
+import random
+from typing import Dict, Optional
+
+import fitz  # PyMuPDF
+
+# Bump when a seed/profile no longer produces the same packet (invalidates cached packets)
+GENERATOR_VERSION = "2"
+
+# Named generator settings for make_packet; "basic" is the original packet shape.
+PROFILES: Dict[str, Dict[str, object]] = {
+    "basic": {},
+    # Every page form the splitter knows about, in roughly real-world proportions
+    "mixed": {
+        "revisit_ratio": 0.03,
+        "next_line_ratio": 0.3,
+        "reference_ratio": 0.15,
+        "image_only_ratio": 0.05,
+    },
+    "banquet_check": {
+        "banquet_check": True,
+        "reference_ratio": 0.1,
+    },
+}
+
+BODY_LINE = "Coffee Break 10:00 AM  Ballroom A  Guarantee: 150"
+
+
+def _logo_pixmap() -> "fitz.Pixmap":
+    """A small RGB image shared by every page, like a hotel logo in the header."""
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 120, 60), False)
+    pix.set_rect(pix.irect, (4, 85, 89))
+    return pix
+
+
+def _scan_png(number: int) -> bytes:
+    """A grayscale 'scan' of a BEO page: rendered text with no text layer once embedded."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((40, 40), f"BEO #: {number}")
+    page.insert_text((60, 180), "Signed contract - see attached", fontsize=14)
+    png = page.get_pixmap(dpi=72, colorspace=fitz.csGRAY).tobytes("png")
+    doc.close()
+    return png
+
+
+def make_packet(
+    path: str,
+    pages: int = 500,
+    seed: int = 0,
+    summary_pages: int = 3,
+    revisit_ratio: float = 0.0,
+    next_line_ratio: float = 0.0,
+    reference_ratio: float = 0.0,
+    image_only_ratio: float = 0.0,
+    banquet_check: bool = False,
+    truth: Optional[dict] = None,
+) -> int:
+    """
+    Write a packet of `pages` pages to path and return the number of distinct BEOs.
+    Each BEO gets a "Banquet Event Order:" first page and 0-3 continuation pages
+    with "BEO #: N" in the upper-left. revisit_ratio is the chance that a BEO
+    reappears later in the packet (non-contiguous BEOs).
+    Optional page forms (all off by default, so a seed keeps producing the same packet):
+      next_line_ratio:  first pages read "BANQUET EVENT ORDER" with the number on the next line
+      reference_ratio:  pages carry a "Reference BEO# N" note naming another BEO
+      image_only_ratio: continuation pages are image-only scans with no text layer (UNKNOWN)
+      banquet_check:    a Banquet Check packet: "BANQUET CHECK" titles and "BEO#: N" headers
+    If truth is given it is filled with what the splitter should find:
+    beos, image_only_pages and reference_pages.
+    """
+    rnd = random.Random(seed)
+    logo: Optional[bytes] = _logo_pixmap().tobytes("png")
+    # Images are embedded once and then referenced by xref
+    logo_xref = scan_xref = 0
+    image_only = references = 0
+    doc = fitz.open()
+    for i in range(min(summary_pages, pages)):
+        page = doc.new_page()
+        if banquet_check:
+            page.insert_text((50, 50), "BANQUET CHECK", fontsize=16)
+        page.insert_text((50, 80), f"Event Summary {i + 1}", fontsize=16)
+        page.insert_text((50, 120), "Daily summary of banquet event orders")
+
+    beo = 10000
+    seen = []
+    while doc.page_count < pages:
+        if seen and rnd.random() < revisit_ratio:
+            number = rnd.choice(seen)
+        else:
+            beo += rnd.randint(1, 9)
+            number = beo
+            seen.append(number)
+        for k in range(rnd.randint(1, 4)):
+            if doc.page_count >= pages:
+                break
+            page = doc.new_page()
+            if k > 0 and image_only_ratio and rnd.random() < image_only_ratio:
+                # Scanned attachment: one shared image, no text at all
+                if scan_xref:
+                    page.insert_image(page.rect, xref=scan_xref)
+                else:
+                    scan_xref = page.insert_image(page.rect, stream=_scan_png(number))
+                image_only += 1
+                continue
+            if logo_xref:
+                page.insert_image(fitz.Rect(430, 20, 550, 80), xref=logo_xref)
+            else:
+                logo_xref = page.insert_image(fitz.Rect(430, 20, 550, 80), stream=logo)
+            # One shape (one content stream) per page: committing each line
+            # separately makes generation several times slower.
+            shape = page.new_shape()
+            if banquet_check:
+                # Header band, right of the upper-left corner region
+                shape.insert_text((300, 50), f"BEO#: {number}", fontsize=14)
+                shape.insert_text((50, 110), "BANQUET CHECK", fontsize=12)
+            elif k == 0 and next_line_ratio and rnd.random() < next_line_ratio:
+                shape.insert_text((50, 50), f"BANQUET EVENT ORDER\n{number}", fontsize=14)
+            elif k == 0:
+                shape.insert_text((50, 50), f"Banquet Event Order: {number}", fontsize=14)
+            else:
+                shape.insert_text((40, 40), f"BEO #: {number}")
+            y = 180
+            lines = 20
+            reference = None
+            if reference_ratio and len(seen) > 1 and rnd.random() < reference_ratio:
+                reference = rnd.choice([s for s in seen[-10:] if s != number] or seen)
+                lines -= 1
+            for _ in range(lines):
+                shape.insert_text((60, y), BODY_LINE, fontname="tiro")
+                y += 24
+            if reference is not None:
+                # Mid-page note, outside the header/footer and upper-left regions
+                shape.insert_text((60, y), f"Reference BEO# {reference} for AV setup", fontname="tiro")
+                references += 1
+            shape.commit()
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    if truth is not None:
+        truth.update(beos=len(seen), image_only_pages=image_only, reference_pages=references)
+    return len(seen)
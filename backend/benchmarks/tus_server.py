@@ -0,0 +1,142 @@
+"""
+Local stand-in for a TUS upload endpoint (Supabase Storage /upload/resumable),
+with fault injection, for exercising app.services.resumable_upload offline.
+"""
+import base64
+import random
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+
+class TusState:
+    """Uploads held in memory, keyed by id."""
+
+    def __init__(self, concatenation: bool = True, fail_rate: float = 0.0, seed: int = 0):
+        self.concatenation = concatenation
+        self.fail_rate = fail_rate
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.uploads: Dict[str, dict] = {}
+        self.failures = 0
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            fail = self.rnd.random() < self.fail_rate
+            self.failures += fail
+            return fail
+
+    def completed(self, object_name: str) -> Optional[bytes]:
+        """Bytes of the finished (non-partial) upload with this objectName, if any."""
+        with self.lock:
+            for upload in self.uploads.values():
+                if (
+                    not upload["partial"]
+                    and upload["metadata"].get("objectName") == object_name
+                    and len(upload["data"]) == upload["length"]
+                ):
+                    return bytes(upload["data"])
+        return None
+
+
+def _decode_metadata(value: str) -> Dict[str, str]:
+    metadata = {}
+    for pair in filter(None, (p.strip() for p in value.split(","))):
+        key, _, encoded = pair.partition(" ")
+        metadata[key] = base64.b64decode(encoded).decode("utf-8") if encoded else ""
+    return metadata
+
+
+class TusHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: TusState
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Tus-Resumable", "1.0.0")
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _upload(self) -> Tuple[Optional[str], Optional[dict]]:
+        upload_id = self.path.rstrip("/").rsplit("/", 1)[-1]
+        return upload_id, self.state.uploads.get(upload_id)
+
+    def do_OPTIONS(self):
+        extensions = "creation,concatenation" if self.state.concatenation else "creation"
+        self._reply(204, {"Tus-Version": "1.0.0", "Tus-Extension": extensions})
+
+    def do_POST(self):
+        if self.state.should_fail():
+            self._reply(503)
+            return
+        metadata = _decode_metadata(self.headers.get("Upload-Metadata", ""))
+        concat = self.headers.get("Upload-Concat", "")
+        upload_id = uuid.uuid4().hex
+        if concat.startswith("final;"):
+            if not self.state.concatenation:
+                self._reply(400)
+                return
+            data = bytearray()
+            with self.state.lock:
+                for url in concat[len("final;"):].split():
+                    part = self.state.uploads[url.rstrip("/").rsplit("/", 1)[-1]]
+                    if len(part["data"]) != part["length"]:
+                        self._reply(400)
+                        return
+                    data += part["data"]
+                self.state.uploads[upload_id] = {
+                    "length": len(data), "data": data, "partial": False, "metadata": metadata,
+                }
+        else:
+            with self.state.lock:
+                self.state.uploads[upload_id] = {
+                    "length": int(self.headers["Upload-Length"]),
+                    "data": bytearray(),
+                    "partial": concat == "partial",
+                    "metadata": metadata,
+                }
+        self._reply(201, {"Location": f"/upload/resumable/{upload_id}"})
+
+    def do_HEAD(self):
+        _, upload = self._upload()
+        if upload is None:
+            self._reply(404)
+            return
+        self._reply(200, {"Upload-Offset": str(len(upload["data"])), "Upload-Length": str(upload["length"])})
+
+    def do_PATCH(self):
+        _, upload = self._upload()
+        length = int(self.headers.get("Content-Length", 0))
+        if upload is None:
+            self.rfile.read(length)
+            self._reply(404)
+            return
+        if int(self.headers["Upload-Offset"]) != len(upload["data"]):
+            self.rfile.read(length)
+            self._reply(409)
+            return
+        body = self.rfile.read(length)
+        if self.state.should_fail():
+            # Keep half of the chunk and fail, like a connection dropped mid-request.
+            with self.state.lock:
+                upload["data"] += body[: len(body) // 2]
+            self._reply(503)
+            return
+        with self.state.lock:
+            upload["data"] += body
+        self._reply(204, {"Upload-Offset": str(len(upload["data"]))})
+
+
+def serve(state: TusState) -> Tuple[ThreadingHTTPServer, str]:
+    """Start a server on a free localhost port; returns (server, endpoint URL)."""
+    handler = type("BoundTusHandler", (TusHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/upload/resumable"
@@ -0,0 +1,55 @@
+-- Durable job queue on the submissions table.
+-- Workers (python -m app.worker) claim pending submissions with a lease;
+-- a submission whose lease expires is picked up again by another worker.
+
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS job_payload JSONB;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS lease_owner TEXT;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
+
+-- Index for finding claimable jobs
+CREATE INDEX IF NOT EXISTS idx_submissions_claimable
+    ON submissions(status, created_at)
+    WHERE job_payload IS NOT NULL;
+
+-- Claim the oldest claimable submission for p_worker.
+-- Claimable: pending, or processing with an expired lease, and attempts left.
+-- Jobs whose lease expired on their last attempt are marked failed.
+CREATE OR REPLACE FUNCTION claim_submission(
+    p_worker TEXT,
+    p_lease_seconds INTEGER,
+    p_max_attempts INTEGER
+)
+RETURNS SETOF submissions
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE submissions
+    SET status = 'failed',
+        error_message = 'Processing did not finish after ' || p_max_attempts || ' attempts',
+        completed_at = NOW(),
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE job_payload IS NOT NULL
+      AND status = 'processing'
+      AND lease_expires_at < NOW()
+      AND attempts >= p_max_attempts;
+
+    RETURN QUERY
+    UPDATE submissions s
+    SET status = 'processing',
+        lease_owner = p_worker,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        attempts = s.attempts + 1
+    WHERE s.id = (
+        SELECT id FROM submissions
+        WHERE job_payload IS NOT NULL
+          AND attempts < p_max_attempts
+          AND (status = 'pending' OR (status = 'processing' AND lease_expires_at < NOW()))
+        ORDER BY created_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING s.*;
+END;
+$$;
@@ -0,0 +1,21 @@
+-- Result cache: reuse the output zip when the same packet is uploaded again.
+-- key = SHA-256 of (uploaded PDF hash, splitter version, split options).
+CREATE TABLE IF NOT EXISTS result_cache (
+    key TEXT PRIMARY KEY,
+    storage_path TEXT NOT NULL,
+    beo_count INTEGER NOT NULL,
+    size_bytes BIGINT NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    last_hit_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Index for least-recently-used eviction
+CREATE INDEX IF NOT EXISTS idx_result_cache_last_hit_at ON result_cache(last_hit_at);
+
+ALTER TABLE result_cache ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role can manage result cache"
+    ON result_cache
+    FOR ALL
+    USING (auth.role() = 'service_role');
@@ -0,0 +1,12 @@
+"""Shared test setup: settings need these variables to import, but no test talks to a real service."""
+import os
+
+for _name in (
+    "API_SECRET_KEY",
+    "SUPABASE_URL",
+    "SUPABASE_KEY",
+    "SUPABASE_SERVICE_KEY",
+    "POSTMARK_API_KEY",
+    "POSTMARK_FROM_EMAIL",
+):
+    os.environ.setdefault(_name, "http://localhost" if _name == "SUPABASE_URL" else "test")
@@ -0,0 +1,50 @@
+"""beo-split batch runs: resume markers and worker crashes."""
+import os
+
+import fitz
+
+from app import cli
+
+
+def make_pdf(path):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "BEO # 10234")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def crash_on_bad_input(input_pdf, file_outdir, **options):
+    # Pool task stand-in: a file named bad*.pdf kills its worker process.
+    if os.path.basename(input_pdf).startswith("bad"):
+        os._exit(1)
+    return {"input": input_pdf, "output_dir": file_outdir, "status": "ok",
+            "pages": 1, "beos": 1, "problem_pages": 0, "seconds": 0.1, "error": ""}
+
+
+def test_resume_skips_only_inputs_split_with_the_same_options(tmp_path):
+    pdf = make_pdf(tmp_path / "packet.pdf")
+    out = str(tmp_path / "out")
+    rows, _ = cli.run_batch([pdf], out)
+    assert rows[0]["status"] == "ok"
+
+    rows, _ = cli.run_batch([pdf], out, resume=True, summary_page_count=3, max_open_writers=8)
+    assert rows[0]["status"] == "skipped"
+
+    rows, _ = cli.run_batch([pdf], out, resume=True, zip_output=True)
+    assert rows[0]["status"] == "ok"
+    assert os.path.isfile(os.path.join(rows[0]["output_dir"], "beos.zip"))
+    rows, _ = cli.run_batch([pdf], out, resume=True)
+    assert rows[0]["status"] == "ok"
+
+
+def test_worker_crash_fails_the_file_and_the_batch_carries_on(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "process_file", crash_on_bad_input)
+    inputs = [str(tmp_path / name) for name in ("a.pdf", "bad.pdf", "c.pdf", "d.pdf")]
+    rows, _ = cli.run_batch(inputs, str(tmp_path / "out"), workers=1)
+    assert [row["status"] for row in rows] == ["ok", "failed", "ok", "ok"]
+    assert "worker process died" in rows[1]["error"]
+
+    report = cli.write_batch_report(str(tmp_path / "out"), rows)
+    with open(report, encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 5
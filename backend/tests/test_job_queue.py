@@ -0,0 +1,107 @@
+"""SQLiteJobQueue claim/lease semantics (the local stand-in for SupabaseJobQueue)."""
+import threading
+import uuid
+
+import pytest
+
+from app.services import job_queue as job_queue_module
+from app.services.job_queue import SQLiteJobQueue
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_queue_module.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteJobQueue(str(tmp_path / "jobs.db"))
+
+
+def test_claim_returns_payload_and_counts_attempts(queue, clock):
+    job_id = uuid.uuid4()
+    queue.enqueue(job_id, {"name": "n"})
+    job = queue.claim("w1", lease_seconds=60, max_attempts=3)
+    assert (job.submission_id, job.payload, job.attempts) == (job_id, {"name": "n"}, 1)
+    assert queue.status(job_id) == "processing"
+    assert queue.claim("w2", lease_seconds=60, max_attempts=3) is None
+
+
+def test_claims_are_exclusive_across_threads(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    ids = [uuid.uuid4() for _ in range(20)]
+    for job_id in ids:
+        queue.enqueue(job_id, {})
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(name):
+        while True:
+            job = queue.claim(name, lease_seconds=60, max_attempts=3)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job.submission_id)
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(ids)
+
+
+def test_expired_lease_is_reclaimed(queue, clock):
+    job_id = uuid.uuid4()
+    queue.enqueue(job_id, {})
+    queue.claim("w1", lease_seconds=60, max_attempts=3)
+
+    clock.now += 30
+    assert queue.renew(job_id, "w1", lease_seconds=60)
+    clock.now += 61
+    job = queue.claim("w2", lease_seconds=60, max_attempts=3)
+    assert (job.submission_id, job.attempts) == (job_id, 2)
+    # The first worker no longer holds the lease
+    assert not queue.renew(job_id, "w1", lease_seconds=60)
+    assert queue.renew(job_id, "w2", lease_seconds=60)
+
+
+def test_unexpired_lease_is_not_reclaimed(queue, clock):
+    job_id = uuid.uuid4()
+    queue.enqueue(job_id, {})
+    queue.claim("w1", lease_seconds=60, max_attempts=3)
+    clock.now += 59
+    assert queue.claim("w2", lease_seconds=60, max_attempts=3) is None
+
+
+def test_max_attempts_marks_job_failed(queue, clock):
+    job_id = uuid.uuid4()
+    queue.enqueue(job_id, {})
+    for attempt in (1, 2):
+        job = queue.claim(f"w{attempt}", lease_seconds=10, max_attempts=2)
+        assert job.attempts == attempt
+        clock.now += 11
+    assert queue.claim("w3", lease_seconds=10, max_attempts=2) is None
+    assert queue.status(job_id) == "failed"
+
+
+def test_finish_only_by_lease_owner(queue, clock):
+    job_id = uuid.uuid4()
+    queue.enqueue(job_id, {})
+    queue.claim("w1", lease_seconds=60, max_attempts=3)
+    queue.finish(job_id, "w2")
+    assert queue.status(job_id) == "processing"
+    queue.finish(job_id, "w1")
+    assert queue.status(job_id) == "done"
+    clock.now += 3600
+    assert queue.claim("w3", lease_seconds=60, max_attempts=3) is None
@@ -0,0 +1,55 @@
+"""match_beo_number against the original regex cascade, plus one case per MATCH_TIERS rule."""
+import pytest
+
+from app.core.beo_split import MATCH_TIERS, PageText, match_beo_number
+from benchmarks.diff_matcher import generate_corpus, legacy_cascade
+
+
+def page(full: str = "", hf: str = "", ul: str = "") -> PageText:
+    # Regions are always part of the full text, as with real pages
+    return PageText(full_text="\n".join(t for t in (hf, ul, full) if t), hf_text=hf, upper_left_text=ul,
+                    extract_seconds=0.0)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_legacy_cascade_on_generated_corpus(seed):
+    for page_text in generate_corpus(3000, seed=seed):
+        beo, status, matches, _ = match_beo_number(page_text)
+        expected_beo, expected_status, expected_matches = legacy_cascade(page_text)
+        assert (status, beo) == (expected_status, expected_beo), page_text
+        assert matches == expected_matches, page_text
+
+
+TIER_CASES = {
+    "hf_banquet_order": page(hf="Banquet Event Order: 10234", full="Banquet Event Order 555"),
+    "full_banquet_order": page(full="Menu\nBanquet Event Order: 10234"),
+    "hf_banquet_order_next_line": page(hf="BANQUET EVENT ORDER\n10234"),
+    "full_banquet_order_next_line": page(full="Setup\nBANQUET EVENT ORDER\n10234"),
+    "upper_left_colon": page(ul="BEO #: 10234", full="Refer to BEO #: 777"),
+    "upper_left_loose": page(ul="BEO 10234"),
+    "hf_hash_no_space": page(hf="BEO#: 10234", full="BEO #: 777"),
+    "full_hash_no_space": page(full="Banquet Check\nBEO#: 10234"),
+    "hf_colon": page(hf="BEO #: 10234", full="BEO 777"),
+    "full_colon": page(full="Guarantee 150\nBEO #: 10234"),
+    "hf_loose": page(hf="BEO 10234", full="BEO 777"),
+    "full_loose_unreferenced": page(full="BEO 10234\nReference BEO 777 for AV"),
+}
+
+
+def test_every_tier_has_a_case():
+    assert set(TIER_CASES) == {rule for rule, _, _ in MATCH_TIERS}
+
+
+@pytest.mark.parametrize("rule", list(TIER_CASES))
+def test_tier_decides_page(rule):
+    page_text = TIER_CASES[rule]
+    beo, status, _, matched_rule = match_beo_number(page_text)
+    assert (status, beo, matched_rule) == ("OK", "10234", rule)
+    assert legacy_cascade(page_text)[:2] == ("10234", "OK")
+
+
+def test_ambiguous_and_unknown():
+    beo, status, matches, _ = match_beo_number(page(hf="Banquet Event Order: 10234 Banquet Event Order: 10235"))
+    assert (status, beo, matches) == ("AMBIGUOUS", None, {"10234", "10235"})
+    beo, status, matches, rule = match_beo_number(page(full="Coffee Break 10:00 AM\nReference BEO# 10234"))
+    assert (status, beo, matches, rule) == ("UNKNOWN", None, set(), "")
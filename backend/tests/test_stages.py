@@ -0,0 +1,44 @@
+"""split_and_zip stage paths."""
+import io
+import queue
+import zipfile
+
+import fitz
+
+from app.core import stages
+
+
+def make_packet(path, texts):
+    doc = fitz.open()
+    for text in texts:
+        page = doc.new_page()
+        if text:
+            page.insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_document_ocr_publishes_the_same_names_as_the_zip(tmp_path, monkeypatch):
+    # A scanned Banquet Check packet: no text until ocrmypdf has run.
+    texts = ["BANQUET CHECK\nBEO#: 10234", "BEO#: 10234", "BANQUET CHECK\nBEO#: 10235"]
+    scanned = make_packet(tmp_path / "scan.pdf", [""] * len(texts))
+    ocr_pdf = make_packet(tmp_path / "scan_ocr.pdf", texts)
+    monkeypatch.setattr(stages, "run_ocr_if_needed", lambda input_pdf, outdir: ocr_pdf)
+    work = tmp_path / "work"
+    work.mkdir()
+    progress = queue.Queue()
+
+    with open(scanned, "rb") as f:
+        num_beos, zip_bytes, stats = stages.split_and_zip(
+            f.read(), str(work), "beos.zip", summary_page_count=0, progress=progress,
+        )
+
+    assert (stats["ocr_mode"], num_beos) == ("document", 2)
+    published = set()
+    while (event := progress.get_nowait()) is not None:
+        if event[0] == "beo":
+            published.add(event[1])
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
+        zipped = {name for name in zf.namelist() if name.endswith(".pdf")}
+    assert published == zipped == {"BC_10234.pdf", "BC_10235.pdf"}
@@ -0,0 +1,105 @@
+"""Upload streaming and size limits."""
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import uuid
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.routes import upload as upload_module
+
+
+def stream(data: bytes, dest_path: str, **kwargs):
+    return asyncio.run(upload_module.stream_upload(UploadFile(io.BytesIO(data)), dest_path, **kwargs))
+
+
+def test_small_upload_stays_in_memory(tmp_path):
+    data = os.urandom(3 * upload_module.UPLOAD_CHUNK_SIZE + 17)
+    dest = str(tmp_path / "in.pdf")
+    content, size, sha256 = stream(data, dest, in_memory_max_bytes=len(data))
+    assert (content, size, sha256) == (data, len(data), hashlib.sha256(data).hexdigest())
+    assert not os.path.exists(dest)
+
+
+def test_large_upload_spills_to_disk(tmp_path):
+    data = os.urandom(3 * upload_module.UPLOAD_CHUNK_SIZE + 17)
+    dest = str(tmp_path / "in.pdf")
+    content, size, sha256 = stream(data, dest, in_memory_max_bytes=upload_module.UPLOAD_CHUNK_SIZE + 1)
+    assert (content, size, sha256) == (dest, len(data), hashlib.sha256(data).hexdigest())
+    with open(dest, "rb") as f:
+        assert f.read() == data
+
+
+def test_oversize_upload_is_413(tmp_path):
+    with pytest.raises(HTTPException) as excinfo:
+        stream(os.urandom(2 * upload_module.UPLOAD_CHUNK_SIZE), str(tmp_path / "in.pdf"), max_bytes=1024)
+    assert excinfo.value.status_code == 413
+
+
+def test_oversize_content_length_is_rejected_before_the_body(monkeypatch):
+    monkeypatch.setattr(settings, "max_file_size_mb", 1)
+    body = b"x" * (settings.max_file_size_bytes + upload_module.MULTIPART_OVERHEAD_BYTES + 1)
+    response = TestClient(app).post(
+        "/api/upload", content=body, headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert response.status_code == 413
+    assert "1MB" in response.json()["detail"]
+
+
+@pytest.fixture
+def upload_dirs(monkeypatch):
+    """Temp directories the upload route creates; its database and processing calls are stubbed."""
+    created = []
+    processed = []
+    real_mkdtemp = tempfile.mkdtemp
+
+    def mkdtemp(**kwargs):
+        created.append(real_mkdtemp(**kwargs))
+        return created[-1]
+
+    async def create_submission(**kwargs):
+        return uuid.uuid4()
+
+    async def process_pdf_async(**kwargs):
+        path = kwargs["pdf_file_path"]
+        processed.append(path is not None and os.path.exists(path))
+
+    monkeypatch.setattr(upload_module.tempfile, "mkdtemp", mkdtemp)
+    monkeypatch.setattr(upload_module.db_service, "create_submission", create_submission)
+    monkeypatch.setattr(upload_module, "process_pdf_async", process_pdf_async)
+    monkeypatch.setattr(settings, "job_queue_mode", "inline")
+    monkeypatch.setattr(settings, "rate_limit_per_hour", 1000)
+    monkeypatch.setattr(settings, "in_memory_max_mb", 0)
+    return created, processed
+
+
+def post_pdf(data: bytes):
+    return TestClient(app).post(
+        "/api/upload",
+        data={"name": "n", "email": "e@example.com"},
+        files={"pdf_file": ("packet.pdf", data, "application/pdf")},
+        headers={"Authorization": f"Bearer {settings.api_secret_key}"},
+    )
+
+
+def test_spilled_upload_directory_is_removed_after_inline_processing(upload_dirs):
+    created, processed = upload_dirs
+    response = post_pdf(os.urandom(1024))
+    assert response.status_code == 200
+    assert processed == [True]
+    assert created and not any(os.path.exists(path) for path in created)
+
+
+def test_rejected_upload_directory_is_removed(upload_dirs, monkeypatch):
+    created, processed = upload_dirs
+    monkeypatch.setattr(settings, "max_file_size_mb", 1)
+    response = post_pdf(os.urandom(settings.max_file_size_bytes + 1))
+    assert response.status_code == 413
+    assert processed == []
+    assert created and not any(os.path.exists(path) for path in created)
@@ -0,0 +1,67 @@
+"""Queue worker job handling."""
+import asyncio
+import os
+import tempfile
+import uuid
+
+import pytest
+
+from app import worker
+from app.services.job_queue import Job
+
+
+@pytest.fixture
+def job_dirs(monkeypatch):
+    """Temp directories the worker creates; storage, database and processing are stubbed."""
+    created = []
+    calls = {"processed": [], "deleted": [], "download_ok": True}
+    real_mkdtemp = tempfile.mkdtemp
+
+    def mkdtemp(**kwargs):
+        created.append(real_mkdtemp(**kwargs))
+        return created[-1]
+
+    async def get_submission(submission_id, use_cache=True):
+        return {"status": "pending"}
+
+    async def download_file(storage_path, local_path):
+        with open(local_path, "wb") as f:
+            f.write(b"%PDF-")
+        return calls["download_ok"]
+
+    async def delete_file(storage_path):
+        calls["deleted"].append(storage_path)
+        return True
+
+    async def process_pdf_async(**kwargs):
+        calls["processed"].append(os.path.exists(kwargs["pdf_file_path"]))
+
+    monkeypatch.setattr(worker.tempfile, "mkdtemp", mkdtemp)
+    monkeypatch.setattr(worker.db_service, "get_submission", get_submission)
+    monkeypatch.setattr(worker.storage_service, "download_file", download_file)
+    monkeypatch.setattr(worker.storage_service, "delete_file", delete_file)
+    monkeypatch.setattr(worker, "process_pdf_async", process_pdf_async)
+    return created, calls
+
+
+def large_job() -> Job:
+    # Over in_memory_max_mb, so the input is downloaded to a temp directory
+    payload = {"pdf_storage_path": "submissions/x/input.pdf", "file_size": 1 << 40}
+    return Job(uuid.uuid4(), payload, 1)
+
+
+def test_downloaded_input_directory_is_removed_after_processing(job_dirs):
+    created, calls = job_dirs
+    asyncio.run(worker._process_job(large_job()))
+    assert calls["processed"] == [True]
+    assert calls["deleted"] == ["submissions/x/input.pdf"]
+    assert created and not any(os.path.exists(path) for path in created)
+
+
+def test_downloaded_input_directory_is_removed_when_the_download_fails(job_dirs):
+    created, calls = job_dirs
+    calls["download_ok"] = False
+    with pytest.raises(Exception, match="Failed to download"):
+        asyncio.run(worker._process_job(large_job()))
+    assert calls["processed"] == []
+    assert created and not any(os.path.exists(path) for path in created)